@@ -1,6 +1,11 @@
 from argparse import ArgumentParser
+from json import dumps
 
 from sqlparser import __version__ as version
+from sqlparser.analyzers import analyze_query
+from sqlparser.emitters import minify
+from sqlparser.grammar import __DIALECTS__ as dialects
+from sqlparser.grammar import get_grammar
 from sqlparser.query import Query, create_query_dict
 from sqlparser.utils import print_process_heading, print_query_dict
 from sqlparser.validators import __all_validators__ as validator_list
@@ -16,6 +21,18 @@ def validate_query(query):
         print(f"{validator_func_name} successfully validated the query")
 
 
+def print_analysis(query):
+    context_text = "ANALYSIS"
+    print_process_heading(context_text)
+
+    findings = analyze_query(query)
+    for finding in findings:
+        print(f"[{finding['rule']}] at index {finding['index']}: {finding['message']}")
+
+    if not findings:
+        print("No performance anti-patterns found")
+
+
 def run(args=None):
     arg_parser = ArgumentParser(
         description=f'SQL Parser - {version}',
@@ -41,6 +58,12 @@ def run(args=None):
         help='Validate the query',
     )
 
+    arg_parser.add_argument(
+        '-a', '--analyze',
+        action='store_true',
+        help='Report performance anti-patterns in the query',
+    )
+
     arg_parser.add_argument(
         '-r', '--raw-output',
         action="store_true",
@@ -48,14 +71,47 @@ def run(args=None):
         default=False,
     )
 
+    arg_parser.add_argument(
+        '-j', '--json',
+        action="store_true",
+        help="print compact query dict as JSON",
+        default=False,
+    )
+
+    arg_parser.add_argument(
+        '-m', '--minify',
+        action="store_true",
+        help="print the minified query",
+        default=False,
+    )
+
+    arg_parser.add_argument(
+        '-d', '--dialect',
+        type=str,
+        choices=list(dialects),
+        help='SQL dialect of the query',
+        default='default',
+    )
+
     args = arg_parser.parse_args(args)
     should_validate = args.validate_query
 
-    query = Query(args.query)
+    if args.minify:
+        print(minify(args.query, grammar=get_grammar(args.dialect)))
+        return
+
+    query = Query(args.query, grammar=get_grammar(args.dialect))
 
     if should_validate:
         validate_query(query)
 
+    if args.analyze:
+        print_analysis(query)
+
+    if args.json:
+        print(dumps(create_query_dict(query, compact=True)))
+        return
+
     query_dict = create_query_dict(query)
     if args.raw_output:
         print(query_dict)
@@ -0,0 +1,299 @@
+"""asyncio interface to parse queries without blocking the event loop."""
+import asyncio
+from codecs import getincrementaldecoder
+from collections import deque
+from functools import partial
+from weakref import WeakKeyDictionary
+
+from sqlparser.exceptions import QueryLimitError, QueryParseError
+from sqlparser.grammar import __DEFAULT_GRAMMAR__
+from sqlparser.query import Query
+
+__INLINE_THRESHOLD__ = 4096
+__MAX_IN_FLIGHT__ = 8
+__CHUNK_SIZE__ = 65536
+
+__MAX_STATEMENT_BYTES__ = 1 << 20
+
+
+def _parse_query(sql, grammar=None, limits=None):
+    """Parse a query, module level so that it can be sent to a process pool."""
+    return Query(sql, grammar=grammar, limits=limits)
+
+
+class StatementSplitter:
+    """Incrementally split SQL text into `;` terminated statements.
+
+    The text is split on the parts found by `grammar.Grammar.scan`, so
+    semicolons and quotes inside literals and comments do not end a
+    statement. The statements are returned as they were written. Every
+    chunk is scanned once, only a trailing part that may continue in the
+    next chunk, e.g. an unterminated literal, is scanned again.
+    """
+
+    def __init__(self, grammar=None, max_bytes=__MAX_STATEMENT_BYTES__, encoding='utf-8'):
+        """Initialize the `StatementSplitter` class.
+
+        Parameters
+        ----------
+        grammar: :class: `grammar.Grammar`
+            Grammar used to scan the text, defaults to `__DEFAULT_GRAMMAR__`.
+        max_bytes: int
+            Maximum encoded size of a statement that is buffered.
+        encoding: str
+            Encoding used to measure the size of a statement.
+        """
+        self.grammar = grammar or __DEFAULT_GRAMMAR__
+        self.max_bytes = max_bytes
+        self.encoding = encoding
+        # Scanned text of the current statement and its encoded size.
+        self._chunks = []
+        self._size = 0
+        # Trailing part that is scanned again along with the next chunk.
+        self._tail = ""
+        self._is_oversized = False
+
+    def _is_blank(self, statement):
+        """Check if a statement only contains whitespace and comments."""
+        return all(match.lastgroup in ('whitespace', 'comment')
+                   for match in self.grammar.scan(statement))
+
+    def _append(self, text):
+        """Append scanned text to the current statement unless it is oversized."""
+        if self._is_oversized or not text:
+            return
+
+        self._chunks.append(text)
+        self._size += len(text.encode(self.encoding))
+
+        if self._size > self.max_bytes:
+            self._chunks, self._size, self._is_oversized = [], 0, True
+
+    def _pop_statement(self):
+        """Get the current statement, a `QueryLimitError` if it is oversized."""
+        statement = "".join(self._chunks)
+        is_oversized = self._is_oversized
+        self._chunks, self._size, self._is_oversized = [], 0, False
+
+        if is_oversized:
+            return QueryLimitError(
+                f"Statement exceeds the limit of {self.max_bytes} bytes", 'max_bytes')
+
+        return None if self._is_blank(statement) else statement
+
+    def feed(self, text):
+        """Feed a chunk of text.
+
+        Parameters
+        ----------
+        text: str
+            Chunk of SQL text.
+
+        Returns
+        -------
+        statements: list
+            Statements that were completed by this chunk. A statement of more
+            than `max_bytes` is not buffered, a `exceptions.QueryLimitError`
+            takes its place.
+        """
+        text = self._tail + text
+        statements = []
+        statement_start = 0
+        tail_start = len(text)
+
+        for match in self.grammar.scan(text):
+            if match.lastgroup == 'separator' and match.group() == ';':
+                self._append(text[statement_start:match.start()])
+                statements.append(self._pop_statement())
+                statement_start = match.end()
+                continue
+
+            # A part that reaches the end of the chunk may continue in the
+            # next one, e.g. an unterminated literal or comment.
+            if match.end() == len(text):
+                tail_start = match.start()
+                break
+
+        self._append(text[statement_start:tail_start])
+        self._tail = text[tail_start:]
+
+        if self._size + len(self._tail.encode(self.encoding)) > self.max_bytes:
+            self._chunks, self._size, self._is_oversized = [], 0, True
+            # A single part longer than the limit is dropped as well, the
+            # scan starts over with the next chunk.
+            if len(self._tail.encode(self.encoding)) > self.max_bytes:
+                self._tail = ""
+
+        return [statement for statement in statements if statement is not None]
+
+    def flush(self):
+        """Return the trailing statement that is not terminated by a `;`."""
+        self._append(self._tail)
+        self._tail = ""
+
+        return self._pop_statement()
+
+
+class AsyncParser:
+    """Parse queries from asyncio code.
+
+    Queries smaller than `inline_threshold` are parsed inline, larger ones are
+    offloaded to an executor with at most `max_in_flight` parses in flight.
+    """
+
+    def __init__(self, executor=None, max_in_flight=__MAX_IN_FLIGHT__,
+                 inline_threshold=__INLINE_THRESHOLD__, grammar=None, limits=None):
+        """Initialize the `AsyncParser` class.
+
+        Parameters
+        ----------
+        executor: :class: `concurrent.futures.Executor`
+            Thread or process pool for heavy queries, the loop's default
+            executor if None.
+        max_in_flight: int
+            Maximum number of queries that are parsed in the executor at once.
+        inline_threshold: int
+            Queries with fewer characters are parsed inline.
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar (dialect) used to parse the queries.
+        limits: :class: `limits.ParseLimits`
+            Resource limits to enforce while parsing.
+        """
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.inline_threshold = inline_threshold
+        self.grammar = grammar
+        self.limits = limits
+        self._semaphores = WeakKeyDictionary()
+
+    def _get_semaphore(self, loop):
+        """Get the in-flight semaphore of an event loop."""
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(
+                self.max_in_flight)
+
+        return semaphore
+
+    async def parse(self, sql, grammar=None, limits=None):
+        """Parse a query.
+
+        Parameters
+        ----------
+        sql: str
+            SQL query to be parsed.
+        grammar: :class: `grammar.Grammar`
+            Grammar to use instead of the parser's grammar.
+        limits: :class: `limits.ParseLimits`
+            Limits to use instead of the parser's limits.
+
+        Returns
+        -------
+        query: :class: `query.Query`
+        """
+        grammar = grammar or self.grammar
+        limits = limits or self.limits
+
+        if len(sql) < self.inline_threshold:
+            return _parse_query(sql, grammar, limits)
+
+        loop = asyncio.get_event_loop()
+        async with self._get_semaphore(loop):
+            return await loop.run_in_executor(
+                self.executor, partial(_parse_query, sql, grammar, limits))
+
+    async def _parse_statement(self, sql):
+        """Parse a statement of a stream, returning the error if it is invalid."""
+        try:
+            return await self.parse(sql)
+        except (QueryParseError, ValueError) as parse_error:
+            # The lexer raises a ValueError for words that are not valid tokens.
+            return parse_error
+
+    async def parse_stream(self, reader, encoding='utf-8'):
+        """Parse `;` separated queries read from a stream.
+
+        Queries are parsed concurrently but yielded in the order they were
+        read. Reading pauses while `max_in_flight` queries are pending.
+
+        Parameters
+        ----------
+        reader: :class: `asyncio.StreamReader`
+            Stream to read the queries from.
+        encoding: str
+            Encoding of the stream.
+
+        Yields
+        ------
+        query: :class: `query.Query` or :class: `Exception`
+            The parsed query, or the `exceptions.QueryParseError` or
+            `ValueError` of a statement that could not be parsed, so that one
+            invalid statement does not end the stream.
+        """
+        loop = asyncio.get_event_loop()
+        decoder = getincrementaldecoder(encoding)()
+        max_bytes = self.limits.max_bytes if self.limits is not None else None
+        splitter = StatementSplitter(self.grammar, max_bytes or __MAX_STATEMENT_BYTES__,
+                                     encoding)
+        pending = deque()
+
+        try:
+            while True:
+                chunk = await reader.read(__CHUNK_SIZE__)
+                statements = splitter.feed(decoder.decode(chunk, final=not chunk))
+
+                if not chunk:
+                    trailing_statement = splitter.flush()
+                    if trailing_statement is not None:
+                        statements.append(trailing_statement)
+
+                for statement in statements:
+                    while len(pending) >= self.max_in_flight:
+                        yield await pending.popleft()
+
+                    if isinstance(statement, QueryLimitError):
+                        parse_error = loop.create_future()
+                        parse_error.set_result(statement)
+                        pending.append(parse_error)
+                    else:
+                        pending.append(loop.create_task(self._parse_statement(statement)))
+
+                if not chunk:
+                    break
+
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # Stop the parses that are left when the consumer stops early.
+            for task in pending:
+                task.cancel()
+
+
+__DEFAULT_PARSER__ = AsyncParser()
+
+
+async def aparse(sql, grammar=None, limits=None):
+    """Parse a query without blocking the event loop.
+
+    Parameters
+    ----------
+    sql: str
+        SQL query to be parsed.
+    grammar: :class: `grammar.Grammar`
+        Compiled grammar (dialect) used to parse the query.
+    limits: :class: `limits.ParseLimits`
+        Resource limits to enforce while parsing.
+
+    Returns
+    -------
+    query: :class: `query.Query`
+    """
+    return await __DEFAULT_PARSER__.parse(sql, grammar, limits)
+
+
+def astream(reader, grammar=None, limits=None, encoding='utf-8'):
+    """Parse `;` separated queries from a stream with `async for`.
+
+    See `AsyncParser.parse_stream` for the details.
+    """
+    return AsyncParser(grammar=grammar, limits=limits).parse_stream(reader, encoding)
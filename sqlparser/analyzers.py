@@ -0,0 +1,204 @@
+"""Detect performance anti-patterns in parsed SQL queries."""
+from re import compile as regex_compile
+
+from sqlparser.constants import __COLUMN_REFERENCE__, __NON_COLUMN_WORDS__, __QUOTED_LITERAL__
+from sqlparser.tokens import Identifier, Keyword, LiteralList, Operator, String, Token
+
+__FUNCTION_CALL__ = regex_compile(r"[A-Za-z_][A-Za-z0-9_.]*\(")
+__COLUMN_ARITHMETIC__ = regex_compile(r"[A-Za-z_][A-Za-z0-9_.]*[-+*/%]")
+__ARITHMETIC_OPERATORS__ = frozenset(['+', '-', '*', '/', '%'])
+__PREDICATE_KEYWORDS__ = frozenset(['AND', 'OR', 'NOT', 'LIKE', 'IN'])
+
+__MAX_DERIVED_TABLE_DEPTH__ = 2
+__MAX_GROUP_BY_COLUMNS__ = 5
+
+
+def get_finding_dict(rule, message, index, depth):
+    """Get a finding dict for a detected anti-pattern.
+
+    Parameters
+    ----------
+    rule: str
+        Name of the anti-pattern, select-star, non-sargable, etc.
+    message: str
+        Finding message
+    index: int
+        Index of the token in the flat query, see `utils.get_flat_query`
+    depth: int
+        Subquery nesting depth of the token
+
+    Returns
+    -------
+    finding_dict: dict
+        Finding dict.
+    """
+    return {
+        'rule': rule,
+        'message': message,
+        'index': index,
+        'depth': depth,
+    }
+
+
+def _references_column(text):
+    """Check if the text of a token references a column, not only literals or calls."""
+    return any(name.upper() not in __NON_COLUMN_WORDS__
+               for name in __COLUMN_REFERENCE__.findall(__QUOTED_LITERAL__.sub(' ', text)))
+
+
+def _is_non_sargable(value):
+    """Check if a function call or arithmetic is applied to a column, `UPPER(name)`."""
+    function_call = __FUNCTION_CALL__.match(value)
+    if function_call is not None:
+        # Calls without a column argument, e.g. `NOW()`, are constants.
+        return _references_column(value[function_call.end():])
+
+    return __COLUMN_ARITHMETIC__.match(value) is not None
+
+
+def _is_table_clause(clause):
+    """Check if a clause keyword introduces tables, FROM, LEFT JOIN, etc."""
+    return clause is not None and (clause == 'FROM' or clause.endswith('JOIN'))
+
+
+class _ClauseState:
+    """Analysis state of a (sub)query, the clause it is in and its GROUP BY."""
+
+    __slots__ = ('tokens', 'depth', 'clause', 'previous_token', 'group_by_index',
+                 'group_by_columns')
+
+    def __init__(self, query, depth):
+        """Initialize the `_ClauseState` class.
+
+        Parameters
+        ----------
+        query: :class: `query.Query`
+            The (sub)query that is analyzed.
+        depth: int
+            Subquery nesting depth of the query.
+        """
+        self.tokens = iter(query.tokens)
+        self.depth = depth
+        self.clause = None
+        self.previous_token = None
+        self.group_by_index = None
+        self.group_by_columns = 0
+
+
+def _check_group_by(state, findings, max_group_by_columns):
+    """Report the GROUP BY clause of a (sub)query if it has too many columns."""
+    if state.group_by_index is not None and state.group_by_columns > max_group_by_columns:
+        findings.append(get_finding_dict(
+            'wide-group-by',
+            f'GROUP BY on {state.group_by_columns} columns, more than {max_group_by_columns}.',
+            state.group_by_index, state.depth))
+
+
+def analyze_query(query, max_derived_table_depth=__MAX_DERIVED_TABLE_DEPTH__,
+                  max_group_by_columns=__MAX_GROUP_BY_COLUMNS__):
+    """Detect performance anti-patterns in a query in a single traversal.
+
+    The detected anti-patterns are `SELECT *` (select-star), functions or
+    arithmetic applied to columns in WHERE (non-sargable), LIKE patterns
+    with a leading wildcard (leading-wildcard), `IN (SELECT ...)`
+    (in-subquery), deeply nested derived tables (nested-derived-table) and
+    wide GROUP BY column sets (wide-group-by).
+
+    Parameters
+    ----------
+    query: :class: `query.Query`
+        The query that is to be analyzed.
+    max_derived_table_depth: int
+        Maximum nesting depth of derived tables in FROM/JOIN clauses.
+    max_group_by_columns: int
+        Maximum number of GROUP BY columns.
+
+    Returns
+    -------
+    findings: list
+        List of finding dicts, see `get_finding_dict`.
+    """
+    findings = []
+    index = 0
+    # Stack of the clause states of the enclosing (sub)queries, subqueries
+    # are analyzed without recursion.
+    state_stack = [_ClauseState(query, 0)]
+
+    while state_stack:
+        state = state_stack[-1]
+        token = next(state.tokens, None)
+
+        if token is None:
+            _check_group_by(state, findings, max_group_by_columns)
+            state_stack.pop()
+            continue
+
+        depth = state.depth
+        previous_token = state.previous_token
+        state.previous_token = token
+
+        if not isinstance(token, Token):
+            if isinstance(previous_token, Keyword) and previous_token.value == 'IN':
+                findings.append(get_finding_dict(
+                    'in-subquery', 'IN (SELECT ...) subquery, consider a JOIN or EXISTS.',
+                    index, depth))
+
+            if _is_table_clause(state.clause) and depth + 1 > max_derived_table_depth:
+                findings.append(get_finding_dict(
+                    'nested-derived-table',
+                    f'Derived table nested {depth + 1} levels deep.', index, depth + 1))
+
+            state_stack.append(_ClauseState(token, depth + 1))
+            continue
+
+        if isinstance(token, LiteralList):
+            # No rule applies to literal lists, their value is built on access.
+            index += 1
+            continue
+
+        value = token.value
+        clause = state.clause
+
+        if isinstance(token, Keyword):
+            if value not in __PREDICATE_KEYWORDS__:
+                _check_group_by(state, findings, max_group_by_columns)
+                state.clause = value
+                state.group_by_index, state.group_by_columns = None, 0
+
+                if value == 'GROUP BY':
+                    state.group_by_index = index
+
+        elif clause == 'SELECT' and (
+                (isinstance(token, Operator) and value == '*'
+                 and isinstance(previous_token, Keyword))
+                or (isinstance(token, Identifier) and value.rstrip(',').endswith('.*'))):
+            findings.append(get_finding_dict(
+                'select-star', 'SELECT * reads every column, list the columns instead.',
+                index, depth))
+
+        elif clause == 'WHERE' and isinstance(token, Identifier) and _is_non_sargable(value):
+            findings.append(get_finding_dict(
+                'non-sargable', f'Function or arithmetic applied to a column, {value}.',
+                index, depth))
+
+        elif (clause == 'WHERE' and isinstance(token, Operator)
+              and value in __ARITHMETIC_OPERATORS__
+              and isinstance(previous_token, Identifier)
+              and _references_column(previous_token.value)):
+            findings.append(get_finding_dict(
+                'non-sargable',
+                f'Arithmetic applied to a column, {previous_token.value} {value}.',
+                index, depth))
+
+        elif (isinstance(token, String) and isinstance(previous_token, Keyword)
+              and previous_token.value == 'LIKE' and value.startswith(("'%", "'_"))):
+            findings.append(get_finding_dict(
+                'leading-wildcard', f'LIKE pattern {value} starts with a wildcard.',
+                index, depth))
+
+        elif clause == 'GROUP BY' and isinstance(token, Identifier):
+            state.group_by_columns += 1
+
+        index += 1
+
+    return findings
@@ -0,0 +1,130 @@
+"""Complexity scoring of parsed queries, e.g. for admission control."""
+from re import compile as regex_compile
+
+from sqlparser.tokens import (Aggregate, Identifier, Keyword, LiteralList,
+                              Operator, Token)
+
+__COMPARISON_OPERATORS__ = frozenset(['=', '<', '>', '<=', '>=', '!='])
+__PREDICATE_KEYWORDS__ = frozenset(['LIKE', 'IN'])
+__COMPARISON__ = regex_compile(r"[^<>=!]+(?:<=|>=|!=|=|<|>)")
+
+__DEFAULT_WEIGHTS__ = {
+    'max_depth': 10.0,
+    'queries': 5.0,
+    'aggregates': 2.0,
+    'predicates': 1.0,
+    'literals': 0.01,
+    'max_literal_list': 0.0,
+    'tokens': 0.1,
+}
+
+
+class QueryComplexity:
+    """Cost vector of a query."""
+
+    __slots__ = ('max_depth', 'queries', 'aggregates', 'predicates', 'literals',
+                 'max_literal_list', 'tokens')
+
+    def __init__(self, max_depth=0, queries=0, aggregates=0, predicates=0, literals=0,
+                 max_literal_list=0, tokens=0):
+        """Initialize the `QueryComplexity` class.
+
+        Parameters
+        ----------
+        max_depth: int
+            Maximum subquery nesting depth.
+        queries: int
+            Number of `Query` nodes, i.e. the query and its subqueries.
+        aggregates: int
+            Number of aggregate function calls.
+        predicates: int
+            Number of comparisons, LIKE and IN predicates.
+        literals: int
+            Number of literals in literal lists.
+        max_literal_list: int
+            Length of the largest literal list.
+        tokens: int
+            Number of tokens, a literal list counts as one token.
+        """
+        self.max_depth = max_depth
+        self.queries = queries
+        self.aggregates = aggregates
+        self.predicates = predicates
+        self.literals = literals
+        self.max_literal_list = max_literal_list
+        self.tokens = tokens
+
+    def __repr__(self):
+        """Return the string representation of the cost vector."""
+        costs = ", ".join(f"{name}={value}" for name, value in self.as_dict().items())
+        return f"QueryComplexity({costs})"
+
+    def as_dict(self):
+        """Return the cost vector in `dict` format."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def score(self, weights=None):
+        """Weigh the cost vector into a single score.
+
+        Parameters
+        ----------
+        weights: dict
+            Weight of each cost, missing costs use `__DEFAULT_WEIGHTS__`.
+
+        Returns
+        -------
+        score: float
+        """
+        weights = dict(__DEFAULT_WEIGHTS__, **(weights or {}))
+
+        return sum(weights[name] * value for name, value in self.as_dict().items())
+
+
+def complexity(query):
+    """Compute the cost vector of a query in a single traversal.
+
+    Parameters
+    ----------
+    query: :class: `query.Query`
+        The query whose complexity is to be computed.
+
+    Returns
+    -------
+    query_complexity: :class: `QueryComplexity`
+    """
+    query_complexity = QueryComplexity()
+    aggregates = query.grammar.token_types['aggregate']
+    # Walk the tree with an explicit stack, deeply nested queries don't
+    # hit the recursion limit.
+    query_stack = [(query, query.depth)]
+
+    while query_stack:
+        current_query, depth = query_stack.pop()
+        query_complexity.queries += 1
+        query_complexity.max_depth = max(query_complexity.max_depth, depth - query.depth)
+
+        for token in current_query.tokens:
+            if not isinstance(token, Token):
+                query_stack.append((token, depth + 1))
+                continue
+
+            query_complexity.tokens += 1
+
+            if isinstance(token, LiteralList):
+                query_complexity.literals += len(token)
+                query_complexity.max_literal_list = max(
+                    query_complexity.max_literal_list, len(token))
+            elif isinstance(token, Aggregate):
+                query_complexity.aggregates += 1
+            elif isinstance(token, Operator):
+                query_complexity.predicates += token.value in __COMPARISON_OPERATORS__
+            elif isinstance(token, Keyword):
+                query_complexity.predicates += token.value in __PREDICATE_KEYWORDS__
+            elif isinstance(token, Identifier):
+                # Identifiers may hold a whole expression, `SUM(height)` or
+                # `height>100`.
+                if "(" in token.value and token.value.split("(")[0] in aggregates:
+                    query_complexity.aggregates += 1
+                query_complexity.predicates += len(__COMPARISON__.findall(token.value))
+
+    return query_complexity
@@ -1,17 +1,29 @@
 
+from re import compile as regex_compile
+
 from sqlparser.tokens import Aggregate, Identifier, Keyword, Operator
 
+# Column names in the text of a token, a name followed by `(` is a function.
+__COLUMN_REFERENCE__ = regex_compile(r"[A-Za-z_][A-Za-z0-9_.$]*(?![A-Za-z0-9_.$(])")
+__QUOTED_LITERAL__ = regex_compile(r"'[^']*'|\"[^\"]*\"")
+# Words that are not column names even if the grammar does not reserve them.
+__NON_COLUMN_WORDS__ = frozenset(['AS', 'ASC', 'DESC', 'DISTINCT', 'ALL', 'NULL', 'IS',
+                                  'BETWEEN', 'TRUE', 'FALSE', 'CASE', 'WHEN', 'THEN',
+                                  'ELSE', 'END', 'EXISTS', 'ON', 'USING', 'LIMIT',
+                                  'OFFSET', 'HAVING'])
+
 __TOKEN_PRECEDENCE__ = {
     Keyword: {'valid': [Aggregate, Identifier, Operator, Keyword],
-              'invalid': ['WHERE', 'AND', 'OR', 'NOT', 'LIKE', 'IN', 'INSERT', 'UPDATE', 'DELETE']},
+              'invalid': ['WHERE', 'AND', 'OR', 'NOT', 'LIKE', 'IN', 'INSERT', 'INSERT INTO',
+                          'UPDATE', 'DELETE']},
 
     Aggregate: {'valid': [Keyword, Aggregate, Identifier, Operator],
-                'invalid': ['INSERT', 'UPDATE', 'DELETE']},
+                'invalid': ['INSERT', 'INSERT INTO', 'UPDATE', 'DELETE']},
 
     Identifier: {'valid': [Keyword, Aggregate, Identifier, Operator],
                  'invalid': []},
 
     Operator: {'valid': [Keyword, Aggregate, Identifier, Operator],
-               'invalid': ['SELECT', 'INSERT', 'UPDATE', 'DELETE']},
+               'invalid': ['SELECT', 'INSERT', 'INSERT INTO', 'UPDATE', 'DELETE']},
 
 }
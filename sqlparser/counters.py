@@ -0,0 +1,65 @@
+"""Operation counters to account for the cost of parsing a query."""
+
+
+class ParseCounters:
+    """Counters of the internal operations performed while parsing.
+
+    Counting is opt-in, pass a `ParseCounters` object to `Query` to enable
+    it. Counters of several parses can be summed, e.g. `sum(counters_list)`.
+    """
+
+    __slots__ = ('tokens', 'regex_evaluations', 'list_copies', 'removals', 'queries')
+
+    def __init__(self, tokens=0, regex_evaluations=0, list_copies=0, removals=0,
+                 queries=0):
+        """Initialize the `ParseCounters` class.
+
+        Parameters
+        ----------
+        tokens: int
+            Number of `Token` objects created by the lexer.
+        regex_evaluations: int
+            Number of regex evaluations to classify and validate tokens.
+        list_copies: int
+            Number of token lists that were copied or rebuilt.
+        removals: int
+            Number of tokens removed from token lists.
+        queries: int
+            Number of `Query` nodes built.
+        """
+        self.tokens = tokens
+        self.regex_evaluations = regex_evaluations
+        self.list_copies = list_copies
+        self.removals = removals
+        self.queries = queries
+
+    def __add__(self, other):
+        """Return the sum of two counters."""
+        if not isinstance(other, ParseCounters):
+            return NotImplemented
+
+        return ParseCounters(**{name: getattr(self, name) + getattr(other, name)
+                                for name in self.__slots__})
+
+    def __radd__(self, other):
+        """Support `sum`, which starts from 0."""
+        if other == 0:
+            return self + ParseCounters()
+
+        return self.__add__(other)
+
+    def __eq__(self, other):
+        """Check if two counters hold the same counts."""
+        if not isinstance(other, ParseCounters):
+            return NotImplemented
+
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        """Return the string representation of the counters."""
+        counts = ", ".join(f"{name}={value}" for name, value in self.as_dict().items())
+        return f"ParseCounters({counts})"
+
+    def as_dict(self):
+        """Return the counters in `dict` format."""
+        return {name: getattr(self, name) for name in self.__slots__}
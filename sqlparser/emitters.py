@@ -0,0 +1,78 @@
+"""Emit compact SQL text from query text or `Query` trees."""
+from io import StringIO
+
+from sqlparser.filters import iter_normalized_query
+from sqlparser.tokens import Token
+
+
+def minify(sql, stream=None, grammar=None):
+    """Minify SQL text in a single streaming pass.
+
+    Comments are stripped and every run of whitespace is reduced to a single
+    space, the text is normalized like `filters.normalize_query`, so that
+    separators are space separated and the output re-parses with `Query` to
+    the query dict of the input. Each piece is written to the stream as soon
+    as it is scanned.
+
+    Parameters
+    ----------
+    sql: str
+        SQL query to be minified.
+    stream: :class: `io.TextIOBase`
+        Text stream to write the minified query to.
+    grammar: :class: `grammar.Grammar`
+        Grammar that defines the keywords, defaults to `__DEFAULT_GRAMMAR__`.
+
+    Returns
+    -------
+    minified_sql: str or None
+        The minified query if no stream is given, None otherwise.
+    """
+    output = StringIO() if stream is None else stream
+    write = output.write
+
+    for text in iter_normalized_query(sql, grammar):
+        write(text)
+
+    if stream is None:
+        return output.getvalue()
+
+
+def write_query(query, stream, format_token=None):
+    """Write a `Query` tree as space separated SQL text to a stream.
+
+    Parameters
+    ----------
+    query: :class: `query.Query`
+        Query that is to be written.
+    stream: :class: `io.TextIOBase`
+        Text stream to write the query to.
+    format_token: callable
+        Function that returns the SQL text of a token, e.g. to replace its
+        literals. Defaults to the value of the token.
+    """
+    write = stream.write
+    # Stack of token iterators, subqueries are written without recursion.
+    token_stack = [iter(query.tokens)]
+    is_empty = True
+
+    while token_stack:
+        token = next(token_stack[-1], None)
+
+        if token is None:
+            token_stack.pop()
+            if token_stack:
+                write(" )")
+            continue
+
+        if not is_empty:
+            write(" ")
+        is_empty = False
+
+        if not isinstance(token, Token):
+            write("(")
+            token_stack.append(iter(token.tokens))
+        elif format_token is not None:
+            write(format_token(token))
+        else:
+            write(token.value)
@@ -13,3 +13,9 @@ class QueryParseError(Exception):
 
     def __str__(self):
         return self.message
+
+
+class QueryLimitError(QueryParseError):
+    def __init__(self, message, limit=None):
+        super(QueryLimitError, self).__init__(message)
+        self.limit = limit
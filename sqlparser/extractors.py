@@ -0,0 +1,192 @@
+"""Fast-path extractors that scan a query without building a `Query`.
+
+The extractors run a minimal state machine directly over the grammar's
+text scanner, no token objects, subqueries or query dicts are created.
+"""
+from re import compile as regex_compile
+
+from sqlparser.constants import __NON_COLUMN_WORDS__
+from sqlparser.grammar import __DEFAULT_GRAMMAR__
+
+__WORD_PARTS__ = regex_compile(
+    r"(?P<identifier>[A-Za-z_][A-Za-z0-9_.$]*)"
+    r"|(?P<number>[0-9]+(?:\.[0-9]+)?)"
+    r"|(?P<operator>[^A-Za-z0-9_\s]+)")
+
+__TABLE_CLAUSES__ = frozenset(['FROM', 'JOIN', 'INTO', 'UPDATE'])
+__COLUMN_CLAUSES__ = frozenset(['SELECT', 'WHERE', 'ON', 'BY', 'HAVING', 'SET'])
+__CLAUSE_END_WORDS__ = frozenset(['VALUES', 'LIMIT', 'OFFSET', 'UNION',
+                                  'RETURNING'])
+
+
+def _scan(sql, grammar):
+    """Yield `(kind, value)` pairs of all the non whitespace parts of a query."""
+    for match in grammar.scan(sql):
+        kind = match.lastgroup
+
+        if kind == 'word':
+            for part in __WORD_PARTS__.finditer(match.group()):
+                yield part.lastgroup, part.group()
+        elif kind not in ('whitespace', 'comment'):
+            yield kind, match.group()
+
+
+def _quoted_identifier(value):
+    """Get the name of a double quoted identifier, None for string literals."""
+    if value.startswith('"'):
+        return value[1:-1]
+
+    return None
+
+
+def _add_unique(names, seen, name):
+    """Append `name` to `names` if it has not been seen yet."""
+    if name not in seen:
+        seen.add(name)
+        names.append(name)
+
+
+def statement_type(sql, grammar=None):
+    """Get the type of a statement, i.e. its leading keyword.
+
+    Parameters
+    ----------
+    sql: str
+        SQL query to be scanned.
+    grammar: :class: `grammar.Grammar`
+        Grammar of the query, defaults to `__DEFAULT_GRAMMAR__`.
+
+    Returns
+    -------
+    statement_type: str
+        Leading keyword, SELECT, INSERT INTO, etc. or None.
+    """
+    grammar = grammar or __DEFAULT_GRAMMAR__
+    words = []
+
+    for kind, value in _scan(sql, grammar):
+        if kind == 'separator' and value == '(' and not words:
+            continue
+
+        upper_value = value.upper()
+        if kind != 'identifier' or upper_value not in grammar.reserved_words:
+            break
+
+        words.append(upper_value)
+
+    return grammar.match_keyword(words, 0)[0]
+
+
+def referenced_tables(sql, grammar=None):
+    """Get the tables that are referenced in a query, including subqueries.
+
+    Parameters
+    ----------
+    sql: str
+        SQL query to be scanned.
+    grammar: :class: `grammar.Grammar`
+        Grammar of the query, defaults to `__DEFAULT_GRAMMAR__`.
+
+    Returns
+    -------
+    tables: list
+        Unique table names in the order of their first reference.
+    """
+    grammar = grammar or __DEFAULT_GRAMMAR__
+    tables, seen = [], set()
+    # None: outside of a table list, 'table': expecting a table name,
+    # 'alias': after a table name, waiting for a `,` or the next clause.
+    state = None
+
+    for kind, value in _scan(sql, grammar):
+        if kind == 'identifier':
+            upper_value = value.upper()
+
+            if upper_value in __TABLE_CLAUSES__:
+                state = 'table'
+            elif (upper_value in grammar.reserved_words or upper_value in __COLUMN_CLAUSES__
+                  or upper_value in __CLAUSE_END_WORDS__):
+                state = None
+            elif state == 'table':
+                _add_unique(tables, seen, value)
+                state = 'alias'
+        elif kind == 'literal' and state == 'table':
+            table = _quoted_identifier(value)
+            if table is not None:
+                _add_unique(tables, seen, table)
+                state = 'alias'
+        elif kind == 'separator':
+            state = 'table' if value == ',' and state == 'alias' else None
+
+    return tables
+
+
+def referenced_columns(sql, grammar=None):
+    """Get the columns that are referenced in a query, including subqueries.
+
+    Columns are collected from the SELECT list and the WHERE, ON, GROUP BY,
+    ORDER BY, HAVING and SET clauses. Function names and aliases are skipped.
+
+    Parameters
+    ----------
+    sql: str
+        SQL query to be scanned.
+    grammar: :class: `grammar.Grammar`
+        Grammar of the query, defaults to `__DEFAULT_GRAMMAR__`.
+
+    Returns
+    -------
+    columns: list
+        Unique column names in the order of their first reference.
+    """
+    grammar = grammar or __DEFAULT_GRAMMAR__
+    columns, seen = [], set()
+    in_columns = False
+    is_alias = False
+    after_term = False
+    # An identifier is only known to be a column once the next part is not
+    # a `(`, i.e. it is not a function name.
+    pending_column = None
+
+    for kind, value in _scan(sql, grammar):
+        if kind == 'separator' and value == '(':
+            pending_column = None
+        elif pending_column is not None:
+            _add_unique(columns, seen, pending_column)
+            pending_column = None
+
+        if kind == 'literal':
+            column = _quoted_identifier(value)
+            if column is not None and in_columns and not (is_alias or after_term):
+                pending_column = column
+            is_alias, after_term = False, True
+            continue
+
+        if kind != 'identifier':
+            is_alias = False
+            after_term = kind == 'number' or value == ')'
+            continue
+
+        upper_value = value.upper()
+        if upper_value == 'AS':
+            is_alias = True
+            continue
+
+        if upper_value in __COLUMN_CLAUSES__:
+            in_columns, after_term = True, False
+        elif upper_value in __TABLE_CLAUSES__ or upper_value in __CLAUSE_END_WORDS__:
+            in_columns, after_term = False, False
+        elif upper_value in grammar.reserved_words or upper_value in __NON_COLUMN_WORDS__:
+            after_term = upper_value == 'END'
+        elif in_columns and not (is_alias or after_term):
+            pending_column, after_term = value, True
+        else:
+            # Aliases (explicit or implicit) and table names end a term.
+            after_term = True
+
+        is_alias = False
+
+    if pending_column is not None:
+        _add_unique(columns, seen, pending_column)
+
+    return columns
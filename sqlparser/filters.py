@@ -1,48 +1,128 @@
 """Various filters for sqlparser package"""
 from types import MethodType
 
-from sqlparser.tokens import __TOKEN_TYPES__ as token_types_dict
+from sqlparser.grammar import __DEFAULT_GRAMMAR__
 from sqlparser.tokens import Identifier
 
 
-def process_separator(query):
+def process_separator(query, grammar=None):
     """Process separator in a SQL query.
 
+    Separators inside quoted literals are left untouched.
+
     Parameters
     ----------
     query: str
         SQL query to be processed
+    grammar: :class: `grammar.Grammar`
+        Grammar that defines the separators
 
     Returns
     -------
     process_query: str
         Processed query
     """
-    separator = token_types_dict['separator']
-
-    for separator in separator:
-        query = query.replace(separator, ' ')
+    grammar = grammar or __DEFAULT_GRAMMAR__
 
-    return query
+    return "".join(" " if match.lastgroup == 'separator' else match.group()
+                   for match in grammar.scan(query))
 
 
-def process_case(query):
+def process_case(query, grammar=None):
     """Process character case in SQL query
 
+    Quoted literals are left untouched.
+
+    Parameters
+    ----------
+    query: str
+        SQL query to be processed
+    grammar: :class: `grammar.Grammar`
+        Grammar used to scan the query
+
+    Returns
+    -------
+    process_query: str
+        Processed query
+    """
+    grammar = grammar or __DEFAULT_GRAMMAR__
+
+    return "".join(match.group().upper() if match.lastgroup == 'word' else match.group()
+                   for match in grammar.scan(query))
+
+
+def normalize_query(query, grammar=None):
+    """Normalize a SQL query in a single pass over the text.
+
+    Keywords and aggregate calls are uppercased, separators are surrounded by
+    single spaces so that every token is space separated, runs of whitespace
+    and comments are collapsed into a single space and quoted literals are
+    left untouched. Function calls like `avg(height)` are kept together, so
+    that aggregates are recognized by `query.create_query_dict`.
+
     Parameters
     ----------
     query: str
         SQL query to be processed
+    grammar: :class: `grammar.Grammar`
+        Grammar that defines the keywords and separators
 
     Returns
     -------
     process_query: str
         Processed query
     """
-    for string_token in query.split(' '):
-        query = query.replace(string_token, string_token.upper())
+    return "".join(iter_normalized_query(query, grammar))
+
+
+def iter_normalized_query(query, grammar=None):
+    """Normalize a SQL query piece by piece, see `normalize_query`.
 
-    return query
+    Parameters
+    ----------
+    query: str
+        SQL query to be processed
+    grammar: :class: `grammar.Grammar`
+        Grammar that defines the keywords and separators
+
+    Yields
+    ------
+    text: str
+        Consecutive pieces of the normalized query.
+    """
+    grammar = grammar or __DEFAULT_GRAMMAR__
+    aggregates = grammar.token_types['aggregate']
+    parts = grammar.scan_parts(query)
+    previous_part, part = None, next(parts, None)
+    call_depth = 0
+    space_next = False
+    last_text = ""
+
+    while part is not None:
+        # One part of lookahead tells function calls from subqueries.
+        next_part = next(parts, None)
+        kind, value, is_spaced, _ = part
+
+        if call_depth:
+            # Inside a function call only whitespace between words is kept.
+            call_depth += (value == '(') - (value == ')') if kind == 'separator' else 0
+            is_spaced = is_spaced and value not in (')', ',') and not last_text.endswith('(')
+            last_text = " " + value if is_spaced else value
+            space_next = False
+        elif (kind == 'separator' and value == '(' and not is_spaced
+              and previous_part is not None and previous_part[0] == 'word'
+              and (not previous_part[3] or previous_part[1] in aggregates)
+              and not (next_part is not None and next_part[3]
+                       and next_part[1] not in aggregates)):
+            call_depth = 1
+            last_text = value
+        else:
+            is_spaced = (is_spaced or space_next or kind == 'separator') and bool(last_text)
+            last_text = " " + value if is_spaced else value
+            space_next = kind == 'separator'
+
+        yield last_text
+        previous_part, part = part, next_part
 
 
 class FilterStack:
@@ -119,9 +199,20 @@ class QueryFilter(FilterStack):
 
     def filter_as_keyword(self, query):
         """Filter to remove all the `AS` tokens and tokens that succeed the token."""
+        tokens = []
+        skip_token = False
 
         for token in query.tokens:
-            if isinstance(token, Identifier) and token.value.lower() == 'as':
-                idx = query.tokens.index(token)
-                query.tokens = query.tokens[:idx] + query.tokens[idx + 2:]
+            if skip_token:
+                skip_token = False
+            elif isinstance(token, Identifier) and token.value.lower() == 'as':
+                skip_token = True
+            else:
+                tokens.append(token)
+
+        if query.counters is not None:
+            query.counters.list_copies += 1
+            query.counters.removals += len(query.tokens) - len(tokens)
+
+        query.tokens = tokens
         return query
@@ -0,0 +1,357 @@
+"""Module to represent a compiled, immutable SQL grammar (dialect)."""
+from collections import deque
+from itertools import islice
+from re import compile as regex_compile
+from re import error
+from re import escape as regex_escape
+from types import MappingProxyType
+
+from sqlparser.constants import __TOKEN_PRECEDENCE__
+from sqlparser.tokens import __TOKEN_TYPES__
+from sqlparser.tokens import (Aggregate, Identifier, Keyword, Number, Operator,
+                              Separator, String, Whitespace)
+from sqlparser.utils import build_keyword_trie, match_keyword
+
+__TOKEN_CLASSES__ = {
+    'keyword': Keyword,
+    'operator': Operator,
+    'separator': Separator,
+    'identifier': Identifier,
+    'number': Number,
+    'string': String,
+    'whitespace': Whitespace,
+    'aggregate': Aggregate,
+}
+
+
+def _freeze_trie(keyword_trie):
+    """Recursively convert a keyword trie into read-only mappings."""
+    return MappingProxyType({
+        word: node if word is None else _freeze_trie(node)
+        for word, node in keyword_trie.items()
+    })
+
+
+def _get_pattern(token_values):
+    """Get the compiled pattern of a token type, None if it is a value list."""
+    if len(token_values) != 1:
+        return None
+
+    try:
+        return regex_compile(token_values[0])
+    except error:
+        return None
+
+
+class Grammar:
+    """Compiled, immutable token table of a SQL dialect.
+
+    A grammar is compiled once and can be shared read-only between any
+    number of `Query` objects and threads.
+    """
+
+    __slots__ = ('name', 'token_types', 'precedence', 'reserved_words',
+                 '_patterns', '_values', '_lexer_regex', '_scanner_regex',
+                 '_keyword_trie', '_lookahead')
+
+    def __init__(self, name='default', token_types=None, token_precedence=None):
+        """Initialize the `Grammar` class.
+
+        Parameters
+        ----------
+        name: str
+            Name of the grammar, usually the SQL dialect.
+        token_types: dict
+            Token types and their values/patterns, defaults to `__TOKEN_TYPES__`.
+        token_precedence: dict
+            Token precedence table, defaults to `__TOKEN_PRECEDENCE__`.
+        """
+        token_types = token_types or __TOKEN_TYPES__
+        token_precedence = token_precedence or __TOKEN_PRECEDENCE__
+
+        frozen_types = MappingProxyType({
+            token_type: tuple(token_values)
+            for token_type, token_values in token_types.items()
+        })
+        frozen_precedence = MappingProxyType({
+            token_class: MappingProxyType({
+                'valid': tuple(rules['valid']),
+                'invalid': frozenset(rules['invalid']),
+            })
+            for token_class, rules in token_precedence.items()
+        })
+        patterns = {token_type: _get_pattern(token_values)
+                    for token_type, token_values in frozen_types.items()}
+        values = MappingProxyType({
+            token_type: frozenset(token_values)
+            for token_type, token_values in frozen_types.items()
+        })
+
+        # Each token type becomes a named branch, the branches are tried in
+        # the order of the token table just like `utils.get_token_class`.
+        branches = []
+        for token_type, token_values in frozen_types.items():
+            if patterns[token_type] is not None:
+                branches.append(
+                    f"(?P<{token_type}>{token_values[0]})")
+            else:
+                literals = "|".join(regex_escape(value)
+                                    for value in token_values)
+                branches.append(f"(?P<{token_type}>(?:{literals})\\Z)")
+
+        # Raw text scanner, quoted literals and comments are matched as a
+        # whole so that nothing inside them is ever treated as a word or
+        # separator.
+        separators = "".join(regex_escape(separator)
+                             for separator in frozen_types.get('separator', ())
+                             if len(separator) == 1)
+        scanner_branches = [
+            r"(?P<literal>'(?:[^']|'')*'?|\"(?:[^\"]|\"\")*\"?)",
+            r"(?P<whitespace>\s+)",
+            r"(?P<comment>--[^\n]*|/\*[\s\S]*?(?:\*/|\Z))",
+        ]
+        if separators:
+            scanner_branches.append(f"(?P<separator>[{separators}])")
+        scanner_branches.append(
+            f"(?P<word>(?:[^\\s'\"{separators}\\-/]|-(?!-)|/(?!\\*))+)")
+        reserved_words = frozenset(
+            word.upper()
+            for token_type in ('keyword', 'aggregate')
+            for value in frozen_types.get(token_type, ())
+            for word in value.split(" "))
+
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'token_types', frozen_types)
+        object.__setattr__(self, 'precedence', frozen_precedence)
+        object.__setattr__(self, '_patterns', MappingProxyType(patterns))
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, 'reserved_words', reserved_words)
+        object.__setattr__(self, '_lexer_regex',
+                           regex_compile("|".join(branches)))
+        object.__setattr__(self, '_scanner_regex',
+                           regex_compile("|".join(scanner_branches)))
+        object.__setattr__(self, '_keyword_trie', _freeze_trie(
+            build_keyword_trie(frozen_types.get('keyword', ()))))
+        # Parts needed to match the longest keyword, or an aggregate and `(`.
+        object.__setattr__(self, '_lookahead', max(
+            [2] + [len(keyword.split(" ")) for keyword in frozen_types.get('keyword', ())]))
+
+    def __setattr__(self, name, value):
+        """Disallow mutating the grammar."""
+        raise AttributeError(f"Grammar {self.name} is immutable")
+
+    def __delattr__(self, name):
+        """Disallow mutating the grammar."""
+        raise AttributeError(f"Grammar {self.name} is immutable")
+
+    def __reduce__(self):
+        """Pickle registered dialects by name and others by their tables."""
+        if __DIALECTS__.get(self.name) is self:
+            return get_grammar, (self.name,)
+
+        precedence = {token_class: dict(rules)
+                      for token_class, rules in self.precedence.items()}
+        return Grammar, (self.name, dict(self.token_types), precedence)
+
+    def __repr__(self):
+        """Return the string representation of the grammar."""
+        return f"Grammar({self.name})"
+
+    def match(self, token_type, value, counters=None):
+        """Check if a value is valid for a token type.
+
+        Parameters
+        ----------
+        token_type: str
+            Name of the token type, keyword, identifier, etc.
+        value: str
+            Value that is to be checked.
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
+
+        Returns
+        -------
+        bool
+        """
+        pattern = self._patterns.get(token_type)
+        if pattern is not None:
+            if counters is not None:
+                counters.regex_evaluations += 1
+            if pattern.match(value):
+                return True
+
+        return value in self._values.get(token_type, ())
+
+    def token_class(self, value):
+        """Get the respective token class of a value.
+
+        Parameters
+        ----------
+        value: str
+            Value of the token, SELECT, WHERE, etc.
+
+        Returns
+        -------
+        token_class: :class: `tokens.Token`
+            The respective token class.
+        """
+        return __TOKEN_CLASSES__[self.token_type(value)]
+
+    def token_type(self, value, counters=None):
+        """Get the respective token type of a value.
+
+        Parameters
+        ----------
+        value: str
+            Value of the token, SELECT, WHERE, etc.
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
+
+        Returns
+        -------
+        token_type: str
+            Name of the token type, keyword, identifier, etc.
+        """
+        if counters is not None:
+            counters.regex_evaluations += 1
+
+        match = self._lexer_regex.match(value)
+        if match is None:
+            raise ValueError(f"Invalid token name: {value}")
+
+        return match.lastgroup
+
+    def scan(self, query, pos=0):
+        """Scan raw query text in a single pass.
+
+        Parameters
+        ----------
+        query: str
+            SQL query to be scanned.
+        pos: int
+            Index of the character to start scanning from.
+
+        Returns
+        -------
+        iterator of match objects whose `lastgroup` is one of literal,
+        whitespace, comment, separator or word.
+        """
+        return self._scanner_regex.finditer(query, pos)
+
+    def match_keyword(self, words, start_idx):
+        """Match the longest keyword in `words` starting at `start_idx`.
+
+        See `utils.match_keyword` for the parameters and return value.
+        """
+        return match_keyword(self._keyword_trie, words, start_idx)
+
+    def scan_parts(self, query):
+        """Scan raw query text into its parts, uppercasing the reserved words.
+
+        Whitespace and comments are dropped. The words of a multi-word keyword
+        are only reserved if the whole keyword matches, and aggregates only if
+        they are followed by `(`, so that columns named `by` or `max` are left
+        as they are. Only as many parts as the longest keyword has words are
+        held in memory at a time.
+
+        Parameters
+        ----------
+        query: str
+            SQL query to be scanned.
+
+        Yields
+        ------
+        part: tuple
+            `(kind, value, is_spaced, is_reserved)` of every part, `is_spaced`
+            tells if whitespace or a comment separates it from the previous one.
+        """
+        aggregates = self.token_types.get('aggregate', ())
+        parts = self._scan_spaced_parts(query)
+        window = deque(islice(parts, self._lookahead))
+
+        while window:
+            reserved_count = 0
+
+            if window[0][0] == 'word':
+                words = [value.upper() if kind == 'word' else value
+                         for kind, value, _ in window]
+                keyword, reserved_count = self.match_keyword(words, 0)
+                if keyword is None:
+                    reserved_count = int(words[0] in aggregates and words[1:2] == ['('])
+
+            for _ in range(max(reserved_count, 1)):
+                kind, value, is_spaced = window.popleft()
+                yield (kind, value.upper() if reserved_count else value, is_spaced,
+                       bool(reserved_count))
+
+            window.extend(islice(parts, self._lookahead - len(window)))
+
+    def _scan_spaced_parts(self, query):
+        """Scan the `(kind, value, is_spaced)` parts that are not whitespace or comments."""
+        is_spaced, is_first = False, True
+
+        for match in self.scan(query):
+            kind = match.lastgroup
+
+            if kind in ('whitespace', 'comment'):
+                is_spaced = True
+                continue
+
+            yield kind, match.group(), is_spaced and not is_first
+            is_spaced, is_first = False, False
+
+    def extend(self, name, **token_types):
+        """Create a new grammar with additional token values.
+
+        Parameters
+        ----------
+        name: str
+            Name of the new grammar.
+        token_types: list
+            Values to be added for each token type, e.g. `keyword=['LIMIT']`.
+
+        Returns
+        -------
+        grammar: :class: `Grammar`
+            The extended grammar.
+        """
+        extended_types = {token_type: list(token_values)
+                          for token_type, token_values in self.token_types.items()}
+
+        for token_type, token_values in token_types.items():
+            extended_values = extended_types.setdefault(token_type, [])
+            extended_values.extend(value for value in token_values
+                                   if value not in extended_values)
+
+        return Grammar(name, extended_types, self.precedence)
+
+
+__DEFAULT_GRAMMAR__ = Grammar()
+
+__DIALECTS__ = {
+    'default': __DEFAULT_GRAMMAR__,
+    'mysql': __DEFAULT_GRAMMAR__.extend(
+        'mysql', keyword=['LIMIT', 'OFFSET', 'HAVING', 'STRAIGHT_JOIN',
+                          'REPLACE', 'REPLACE INTO', 'ON DUPLICATE KEY UPDATE']),
+    'postgres': __DEFAULT_GRAMMAR__.extend(
+        'postgres', keyword=['LIMIT', 'OFFSET', 'HAVING', 'ILIKE',
+                             'RETURNING', 'ON CONFLICT']),
+}
+
+
+def get_grammar(dialect='default'):
+    """Get the compiled grammar of a SQL dialect.
+
+    Parameters
+    ----------
+    dialect: str
+        Name of the dialect, default, mysql or postgres.
+
+    Returns
+    -------
+    grammar: :class: `Grammar`
+    """
+    try:
+        return __DIALECTS__[dialect]
+    except KeyError:
+        raise ValueError(f"Unknown SQL dialect: {dialect}")
@@ -0,0 +1,150 @@
+"""Structural (Merkle) hashing of queries and sharing of common subqueries."""
+from collections import OrderedDict
+from hashlib import blake2b
+from heapq import nlargest
+from itertools import islice
+from threading import Lock
+
+from sqlparser.tokens import LiteralList, Number, String, Token
+
+__HASH_SIZE__ = 16
+# Number of literals of a literal list that are hashed at once.
+__LITERAL_CHUNK_SIZE__ = 4096
+__MAX_POOL_SIZE__ = 65536
+
+
+def get_structural_hashes(tokens):
+    """Compute the structural hashes of a list of tokens.
+
+    Subqueries contribute their own (already computed) hashes, so hashing a
+    query tree bottom-up only touches every token once.
+
+    Parameters
+    ----------
+    tokens: list
+        Tokens and subqueries of a query.
+
+    Returns
+    -------
+    tuple
+        Tuple containing the structural hash and the shape hash, i.e. the
+        structural hash computed with all the literals ignored.
+    """
+    structural_hash = blake2b(digest_size=__HASH_SIZE__)
+    shape_hash = blake2b(digest_size=__HASH_SIZE__)
+
+    for token in tokens:
+        if not isinstance(token, Token):
+            structural_hash.update(b'Q' + token.structural_hash)
+            shape_hash.update(b'Q' + token.shape_hash)
+            continue
+
+        if isinstance(token, LiteralList):
+            # The literals are hashed in chunks, `value` would build the
+            # SQL text of the whole list.
+            structural_hash.update(f"LiteralList\0{token.literal_class.__name__}\0".encode())
+            literals = iter(token)
+            for chunk in iter(lambda: list(islice(literals, __LITERAL_CHUNK_SIZE__)), []):
+                structural_hash.update(("\0".join(chunk) + "\0").encode())
+            shape_hash.update(b"LiteralList\0?\0")
+            continue
+
+        token_bytes = f"{token.__class__.__name__}\0{token.value}\0".encode()
+        structural_hash.update(token_bytes)
+
+        if isinstance(token, (Number, String)):
+            shape_hash.update(f"{token.__class__.__name__}\0?\0".encode())
+        else:
+            shape_hash.update(token_bytes)
+
+    return structural_hash.digest(), shape_hash.digest()
+
+
+class SubqueryPool:
+    """Bounded pool of structurally identical subqueries.
+
+    Subqueries that are added to the pool are replaced by a single shared
+    instance, which also shares its compact query dict. The least recently
+    used subquery, and its count, is evicted once the pool is full. The pool
+    can be shared across a workload and safely used from multiple threads.
+    """
+
+    def __init__(self, ignore_literals=False, max_size=__MAX_POOL_SIZE__):
+        """Initialize the `SubqueryPool` class.
+
+        Parameters
+        ----------
+        ignore_literals: bool
+            Whether to count subqueries that only differ in their literals as
+            repetitions of each other in `most_common`.
+        max_size: int
+            Maximum number of subqueries, and of counts, in the pool.
+        """
+        self.ignore_literals = ignore_literals
+        self.max_size = max_size
+        self.evictions = 0
+        self._queries = OrderedDict()
+        # Count key to the `[representative query, count]` of the key.
+        self._counts = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        """Return the number of unique subqueries in the pool."""
+        return len(self._queries)
+
+    def intern(self, query):
+        """Get the shared instance of a subquery.
+
+        Parameters
+        ----------
+        query: :class: `query.Query`
+            Subquery that is to be interned.
+
+        Returns
+        -------
+        query: :class: `query.Query`
+            The shared instance of the subquery.
+        """
+        count_key = query.shape_hash if self.ignore_literals else query.structural_hash
+
+        with self._lock:
+            shared_query = self._queries.get(query.structural_hash)
+            if shared_query is None:
+                shared_query = self._queries[query.structural_hash] = query
+                if len(self._queries) > self.max_size:
+                    self._queries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._queries.move_to_end(query.structural_hash)
+
+            count = self._counts.get(count_key)
+            if count is None:
+                self._counts[count_key] = [shared_query, 1]
+                if len(self._counts) > self.max_size:
+                    self._counts.popitem(last=False)
+            else:
+                count[1] += 1
+                self._counts.move_to_end(count_key)
+
+        return shared_query
+
+    def most_common(self, n=None):
+        """Report the most repeated subqueries.
+
+        Parameters
+        ----------
+        n: int
+            Number of subqueries to report, all of them if None.
+
+        Returns
+        -------
+        list
+            List of `(query, count)` tuples, most repeated first.
+        """
+        with self._lock:
+            counts = [tuple(count) for count in self._counts.values()]
+
+        if n is None:
+            return sorted(counts, key=lambda count: count[1], reverse=True)
+
+        return nlargest(n, counts, key=lambda count: count[1])
@@ -0,0 +1,397 @@
+"""Inverted index of a workload of parsed queries."""
+from array import array
+from bisect import bisect_left
+from heapq import merge
+from json import dumps, loads
+from mmap import ACCESS_READ, mmap
+from struct import pack, unpack_from
+from sys import byteorder
+
+from sqlparser.constants import __COLUMN_REFERENCE__, __NON_COLUMN_WORDS__, __QUOTED_LITERAL__
+from sqlparser.grammar import __DEFAULT_GRAMMAR__
+from sqlparser.query import create_query_dict
+
+__INDEX_MAGIC__ = b'SQPIDX\x00\x01'
+__POSTING_TYPECODE__ = 'I'
+__TERM_KINDS__ = ('table', 'column', 'keyword', 'aggregate')
+
+# Posting list of every indexed query id, it is not a searchable term.
+__QUERY_IDS_TERM__ = ('query', '*')
+
+
+def _get_term(kind, value):
+    """Get the normalized `(kind, value)` term, names are lowercase, keywords uppercase."""
+    if kind not in __TERM_KINDS__:
+        raise ValueError(f"Unknown index term kind: {kind}")
+
+    if kind == 'keyword':
+        return kind, value.upper()
+
+    if kind == 'aggregate':
+        aggregate_name, parenthesis, argument = value.partition('(')
+        return kind, aggregate_name.upper() + parenthesis + argument.lower()
+
+    return kind, value.lower()
+
+
+def _get_column_names(column, tables, aliases):
+    """Get the bare and table qualified names of a column reference."""
+    qualifier, _, name = column.lower().rpartition('.')
+    column_names = [name]
+
+    if qualifier:
+        column_names.append(f"{aliases.get(qualifier, qualifier)}.{name}")
+    elif len(tables) == 1:
+        column_names.append(f"{tables[0]}.{name}")
+
+    return column_names
+
+
+def get_index_terms(query_dict, grammar=None):
+    """Get the index terms of a query dict, including its subqueries.
+
+    Tables are read from FROM, UPDATE, INSERT INTO and JOIN clauses. Columns
+    are indexed by their bare name and, when the table is known from a
+    qualifier, an alias or a single table FROM clause, by `table.column`.
+    Aggregates are indexed by their name and by `NAME(column)`.
+
+    Parameters
+    ----------
+    query_dict: dict
+        Compact query dict, see `query.create_query_dict`.
+    grammar: :class: `grammar.Grammar`
+        Grammar that defines the keywords and aggregates.
+
+    Returns
+    -------
+    terms: set
+        Set of `(kind, value)` terms.
+    """
+    grammar = grammar or __DEFAULT_GRAMMAR__
+    aggregate_names = grammar.token_types['aggregate']
+    terms = set()
+    # Stack of query dicts, subqueries are walked without recursion.
+    query_dict_stack = [query_dict]
+
+    while query_dict_stack:
+        query_dict = query_dict_stack.pop()
+        tables, aliases, columns, aggregates = [], {}, [], []
+
+        for keyword, values in query_dict.items():
+            terms.add(('keyword', keyword.upper()))
+            is_table_clause = (keyword in ('FROM', 'UPDATE', 'INSERT INTO')
+                               or keyword.endswith('JOIN'))
+            expects_table, last_table = True, None
+
+            for value in values:
+                if isinstance(value, dict):
+                    if value and all(name in aggregate_names for name in value):
+                        aggregates.extend(value.items())
+                    else:
+                        query_dict_stack.append(value)
+                    expects_table, last_table = False, None
+                    continue
+
+                # Literal lists are tuples, they contain no names.
+                if not isinstance(value, str):
+                    continue
+
+                if is_table_clause and value.upper() in ('ON', 'USING'):
+                    is_table_clause = False
+                    continue
+
+                if is_table_clause:
+                    name = value.rstrip(',').lower()
+                    if name and expects_table:
+                        tables.append(name)
+                        last_table = name
+                    elif name and last_table is not None:
+                        aliases[name] = last_table
+                    expects_table = not name or value.endswith(',')
+                    continue
+
+                columns.extend(__COLUMN_REFERENCE__.findall(__QUOTED_LITERAL__.sub(' ', value)))
+
+        terms.update(('table', table) for table in tables)
+
+        for column in columns:
+            if column.upper() in grammar.reserved_words or column.upper() in __NON_COLUMN_WORDS__:
+                continue
+            terms.update(('column', name) for name in _get_column_names(column, tables, aliases))
+
+        for aggregate_name, argument in aggregates:
+            terms.add(('aggregate', aggregate_name))
+            if argument.strip() == '*':
+                terms.add(('aggregate', f"{aggregate_name}(*)"))
+
+            for column in __COLUMN_REFERENCE__.findall(argument):
+                if column.upper() in __NON_COLUMN_WORDS__:
+                    continue
+                for name in _get_column_names(column, tables, aliases):
+                    terms.add(('column', name))
+                    terms.add(('aggregate', f"{aggregate_name}({name})"))
+
+    return terms
+
+
+def intersect(*posting_lists):
+    """Intersect sorted posting lists (AND).
+
+    The shortest list is probed into the longer ones with binary searches,
+    so the cost grows with the shortest list only.
+
+    Parameters
+    ----------
+    posting_lists: sequence
+        Sorted query ids.
+
+    Returns
+    -------
+    query_ids: :class: `array.array`
+    """
+    if not posting_lists:
+        return array(__POSTING_TYPECODE__)
+
+    posting_lists = sorted(posting_lists, key=len)
+    query_ids = array(__POSTING_TYPECODE__, posting_lists[0])
+
+    for posting_list in posting_lists[1:]:
+        matched_ids = array(__POSTING_TYPECODE__)
+        start_idx = 0
+
+        for query_id in query_ids:
+            start_idx = bisect_left(posting_list, query_id, start_idx)
+            if start_idx == len(posting_list):
+                break
+            if posting_list[start_idx] == query_id:
+                matched_ids.append(query_id)
+
+        query_ids = matched_ids
+        if not query_ids:
+            break
+
+    return query_ids
+
+
+def union(*posting_lists):
+    """Merge sorted posting lists (OR).
+
+    Parameters
+    ----------
+    posting_lists: sequence
+        Sorted query ids.
+
+    Returns
+    -------
+    query_ids: :class: `array.array`
+    """
+    query_ids = array(__POSTING_TYPECODE__)
+    last_query_id = None
+
+    for query_id in merge(*posting_lists):
+        if query_id != last_query_id:
+            query_ids.append(query_id)
+            last_query_id = query_id
+
+    return query_ids
+
+
+class WorkloadIndex:
+    """Inverted index from tables, columns, keywords and aggregates to query ids.
+
+    Posting lists are sorted arrays of unsigned 32 bit query ids. A loaded
+    index reads its posting lists straight from a memory-mapped file, a
+    posting list is only copied into memory when a query is added to it.
+    """
+
+    def __init__(self, grammar=None):
+        """Initialize the `WorkloadIndex` class.
+
+        Parameters
+        ----------
+        grammar: :class: `grammar.Grammar`
+            Grammar used to read query dicts that are added without a `Query`.
+        """
+        self.grammar = grammar or __DEFAULT_GRAMMAR__
+        self.next_id = 0
+        self._count = 0
+        self._postings = {}
+        self._mmap = None
+
+    def __len__(self):
+        """Return the number of indexed queries."""
+        return self._count
+
+    def add(self, query, query_id=None):
+        """Add a query to the index.
+
+        Parameters
+        ----------
+        query: :class: `query.Query` or dict
+            Query or its compact query dict, see `query.create_query_dict`.
+        query_id: int
+            Id of the query, defaults to the id after the largest id so far.
+
+        Returns
+        -------
+        query_id: int
+        """
+        if isinstance(query, dict):
+            terms = get_index_terms(query, self.grammar)
+        else:
+            terms = get_index_terms(create_query_dict(query, compact=True), query.grammar)
+
+        if query_id is None:
+            query_id = self.next_id
+        self.next_id = max(self.next_id, query_id + 1)
+
+        # A query that is added again under the same id is not counted twice.
+        self._count += self._add_posting(__QUERY_IDS_TERM__, query_id)
+        for term in terms:
+            self._add_posting(term, query_id)
+
+        return query_id
+
+    def _add_posting(self, term, query_id):
+        """Add a query id to the posting list of a term, False if it was in it."""
+        postings = self._postings.get(term)
+
+        if postings is None:
+            self._postings[term] = array(__POSTING_TYPECODE__, [query_id])
+            return True
+
+        if not isinstance(postings, array):
+            # Copy on write, the memory-mapped file is read-only.
+            postings = self._postings[term] = array(__POSTING_TYPECODE__, postings)
+
+        if not postings or postings[-1] < query_id:
+            postings.append(query_id)
+            return True
+
+        idx = bisect_left(postings, query_id)
+        if idx < len(postings) and postings[idx] == query_id:
+            return False
+
+        postings.insert(idx, query_id)
+        return True
+
+    def postings(self, kind, value):
+        """Get the sorted query ids of a term.
+
+        Parameters
+        ----------
+        kind: str
+            Kind of the term, table, column, keyword or aggregate.
+        value: str
+            Name of the term, e.g. `person`, `person.height` or `AVG(height)`.
+
+        Returns
+        -------
+        query_ids: :class: `array.array`
+            Copy of the posting list, it stays valid after `close`.
+        """
+        return array(__POSTING_TYPECODE__, self._get_postings(kind, value))
+
+    def _get_postings(self, kind, value):
+        """Get the posting list of a term without copying it."""
+        return self._postings.get(_get_term(kind, value), ())
+
+    def all_of(self, *terms):
+        """Get the query ids that match all of the `(kind, value)` terms."""
+        return intersect(*(self._get_postings(kind, value) for kind, value in terms))
+
+    def any_of(self, *terms):
+        """Get the query ids that match any of the `(kind, value)` terms."""
+        return union(*(self._get_postings(kind, value) for kind, value in terms))
+
+    def save(self, path):
+        """Save the index to a file that can be memory-mapped by `load`.
+
+        Parameters
+        ----------
+        path: str
+            Path of the index file.
+        """
+        directory = []
+        offset = 0
+        for (kind, value), postings in sorted(self._postings.items()):
+            directory.append([kind, value, offset, len(postings)])
+            offset += len(postings)
+
+        header = dumps({'next_id': self.next_id, 'count': self._count,
+                        'terms': directory}).encode()
+        padding = -(len(__INDEX_MAGIC__) + 8 + len(header)) % 8
+
+        with open(path, 'wb') as index_file:
+            index_file.write(__INDEX_MAGIC__)
+            index_file.write(pack('<Q', len(header)))
+            index_file.write(header)
+            index_file.write(b'\0' * padding)
+
+            for kind, value, _, _ in directory:
+                postings = array(__POSTING_TYPECODE__, self._postings[(kind, value)])
+                # Posting lists are stored little endian.
+                if byteorder == 'big':
+                    postings.byteswap()
+                postings.tofile(index_file)
+
+    @classmethod
+    def load(cls, path, grammar=None):
+        """Load an index that was saved with `save`.
+
+        Parameters
+        ----------
+        path: str
+            Path of the index file.
+        grammar: :class: `grammar.Grammar`
+            Grammar used to read query dicts that are added later.
+
+        Returns
+        -------
+        index: :class: `WorkloadIndex`
+        """
+        with open(path, 'rb') as index_file:
+            index_mmap = mmap(index_file.fileno(), 0, access=ACCESS_READ)
+
+        if index_mmap[:len(__INDEX_MAGIC__)] != __INDEX_MAGIC__:
+            index_mmap.close()
+            raise ValueError(f"Not a workload index file: {path}")
+
+        header_size, = unpack_from('<Q', index_mmap, len(__INDEX_MAGIC__))
+        header_start = len(__INDEX_MAGIC__) + 8
+        header = loads(index_mmap[header_start:header_start + header_size].decode())
+        postings_start = header_start + header_size
+        postings_start += -postings_start % 8
+
+        index = cls(grammar)
+        index.next_id = header['next_id']
+        index._count = header['count']
+        postings_view = memoryview(index_mmap)[postings_start:].cast(__POSTING_TYPECODE__)
+
+        for kind, value, offset, length in header['terms']:
+            postings = postings_view[offset:offset + length]
+            if byteorder == 'big':
+                postings = array(__POSTING_TYPECODE__, postings)
+                postings.byteswap()
+            index._postings[(kind, value)] = postings
+
+        if byteorder == 'big':
+            postings_view.release()
+            index_mmap.close()
+        else:
+            index._mmap = (index_mmap, postings_view)
+
+        return index
+
+    def close(self):
+        """Release the memory-mapped file of a loaded index.
+
+        The index cannot be searched after it is closed.
+        """
+        self._postings = {}
+
+        if self._mmap is not None:
+            index_mmap, postings_view = self._mmap
+            postings_view.release()
+            index_mmap.close()
+            self._mmap = None
@@ -0,0 +1,113 @@
+"""Flyweight pool of shared tokens for parsing large batches of queries."""
+from collections import OrderedDict
+from sys import intern
+from threading import Lock
+
+__MAX_POOL_SIZE__ = 65536
+# Literals are rarely repeated, pooling them would only evict useful tokens.
+__INTERNED_TOKEN_TYPES__ = frozenset(['keyword', 'operator', 'separator', 'identifier',
+                                      'aggregate', 'whitespace'])
+
+
+class TokenPool:
+    """Bounded pool of shared, frozen tokens.
+
+    Identical token text of the same type and grammar is mapped to a single
+    token object, so the tokens of many parsed queries share memory and can
+    be compared by identity. The least recently used token is evicted once
+    the pool is full. The pool can be shared across a workload and safely
+    used from multiple threads.
+    """
+
+    def __init__(self, max_size=__MAX_POOL_SIZE__, token_types=__INTERNED_TOKEN_TYPES__):
+        """Initialize the `TokenPool` class.
+
+        Parameters
+        ----------
+        max_size: int
+            Maximum number of tokens in the pool.
+        token_types: set
+            Token types that are pooled, other tokens are created as usual.
+        """
+        self.max_size = max_size
+        self.token_types = frozenset(token_types)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tokens = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        """Return the number of tokens in the pool."""
+        return len(self._tokens)
+
+    @property
+    def hit_rate(self):
+        """Return the share of lookups that were served from the pool."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, token_class, value, grammar=None, counters=None):
+        """Get the shared token of a value.
+
+        Parameters
+        ----------
+        token_class: :class: `tokens.Token`
+            Class of the token, e.g. `Identifier`.
+        value: str
+            Value of the token.
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate a new token.
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations of a new token, not counted if None.
+
+        Returns
+        -------
+        token: :class: `tokens.Token`
+            The shared token, it cannot be modified.
+        """
+        key = (token_class, value, grammar)
+
+        with self._lock:
+            token = self._tokens.get(key)
+
+            if token is not None:
+                self._tokens.move_to_end(key)
+                self.hits += 1
+                return token
+
+            self.misses += 1
+
+        token = token_class(intern(value), grammar=grammar, counters=counters)
+        token._freeze()
+
+        with self._lock:
+            # Another thread may have added the token in the meantime.
+            token = self._tokens.setdefault(key, token)
+            if len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+                self.evictions += 1
+
+        return token
+
+    def clear(self):
+        """Remove all the tokens and reset the statistics."""
+        with self._lock:
+            self._tokens.clear()
+            self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def stats(self):
+        """Get the statistics of the pool.
+
+        Returns
+        -------
+        stats: dict
+            Dict of the size, hits, misses, evictions and hit rate.
+        """
+        return {
+            'size': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+        }
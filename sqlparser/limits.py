@@ -0,0 +1,84 @@
+"""Resource limits that bound the cost of parsing a query."""
+from time import monotonic
+
+from sqlparser.exceptions import QueryLimitError
+
+
+class ParseLimits:
+    """Configurable resource limits for parsing a query.
+
+    Every limit defaults to `None`, which disables the respective check.
+    """
+
+    def __init__(self, max_bytes=None, max_tokens=None, max_depth=None,
+                 timeout=None):
+        """Initialize the `ParseLimits` class.
+
+        Parameters
+        ----------
+        max_bytes: int
+            Maximum size of the query string in bytes.
+        max_tokens: int
+            Maximum number of tokens in the query.
+        max_depth: int
+            Maximum nesting depth of subqueries.
+        timeout: float
+            Wall-clock time in seconds allowed for parsing the query.
+        """
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.max_depth = max_depth
+        self.timeout = timeout
+
+    def guard(self):
+        """Return a `ParseGuard` that starts the deadline clock now."""
+        return ParseGuard(self)
+
+
+class ParseGuard:
+    """Per parse state used to cooperatively enforce `ParseLimits`."""
+
+    def __init__(self, limits):
+        """Initialize the `ParseGuard` class.
+
+        Parameters
+        ----------
+        limits: :class: `ParseLimits`
+            Limits that are to be enforced.
+        """
+        self.limits = limits
+        self.deadline = None
+
+        if limits.timeout is not None:
+            self.deadline = monotonic() + limits.timeout
+
+    def check_bytes(self, query):
+        """Check the size of the query string."""
+        max_bytes = self.limits.max_bytes
+        if max_bytes is not None and len(query.encode('utf-8')) > max_bytes:
+            raise QueryLimitError(
+                f"Query exceeds the limit of {max_bytes} bytes", 'max_bytes')
+
+    def check_tokens(self, token_count):
+        """Check the number of tokens produced so far."""
+        max_tokens = self.limits.max_tokens
+        if max_tokens is not None and token_count > max_tokens:
+            raise QueryLimitError(
+                f"Query exceeds the limit of {max_tokens} tokens", 'max_tokens')
+
+    def check_depth(self, depth):
+        """Check the nesting depth of a subquery."""
+        max_depth = self.limits.max_depth
+        if max_depth is not None and depth > max_depth:
+            raise QueryLimitError(
+                f"Query exceeds the subquery depth limit of {max_depth}", 'max_depth')
+
+    def disarm(self):
+        """Stop enforcing the deadline once the parse has finished."""
+        self.deadline = None
+
+    def check_deadline(self):
+        """Check if the parse deadline has passed."""
+        if self.deadline is not None and monotonic() > self.deadline:
+            raise QueryLimitError(
+                f"Query parse exceeded the timeout of {self.limits.timeout}s", 'timeout')
@@ -0,0 +1,344 @@
+"""Streaming readers for PostgreSQL and MySQL slow-query logs."""
+from gzip import open as gzip_open
+from re import IGNORECASE
+from re import compile as regex_compile
+
+from sqlparser.exceptions import QueryLimitError, QueryParseError
+from sqlparser.filters import normalize_query
+from sqlparser.grammar import get_grammar
+from sqlparser.query import Query, create_query_dict
+
+__GZIP_MAGIC__ = b'\x1f\x8b'
+__MAX_STATEMENT_BYTES__ = 1 << 20
+
+__POSTGRES_DURATION__ = regex_compile(
+    r"(?P<prefix>.*?)\bLOG:\s+duration: (?P<duration>[0-9.]+) ms\s+"
+    r"(?:statement|execute [^:]*):\s?(?P<sql>.*)")
+__POSTGRES_TIMESTAMP__ = regex_compile(
+    r"\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d(?:\.\d+)?(?: [A-Z]{2,5}| ?[+-]\d\d(?::?\d\d)?)?")
+__POSTGRES_USER__ = regex_compile(r"(?:user=)?(?P<user>[\w$-]+)@(?:db=)?(?P<database>[\w$-]+)")
+
+__MYSQL_TIME__ = regex_compile(r"# Time: (?P<timestamp>.+)")
+__MYSQL_USER__ = regex_compile(r"# User@Host: (?P<user>[^\[\s]*)")
+__MYSQL_QUERY_TIME__ = regex_compile(r"# Query_time: (?P<duration>[0-9.]+)")
+__MYSQL_USE__ = regex_compile(r"use `?(?P<database>[^`;\s]+)`?;", flags=IGNORECASE)
+__MYSQL_SET_TIMESTAMP__ = regex_compile(r"SET timestamp=\d+;", flags=IGNORECASE)
+
+
+class LogRecord:
+    """Statement read from a slow-query log along with its metadata."""
+
+    __slots__ = ('sql', 'duration', 'timestamp', 'user', 'database',
+                 'query', 'query_dict', 'error')
+
+    def __init__(self, sql, duration, timestamp=None, user=None, database=None):
+        """Initialize the `LogRecord` class.
+
+        Parameters
+        ----------
+        sql: str
+            SQL text of the statement, None if it exceeded the size limit.
+        duration: float
+            Duration of the statement in milliseconds.
+        timestamp: str
+            Timestamp of the log entry as written in the log.
+        user: str
+            Name of the user that ran the statement.
+        database: str
+            Name of the database the statement ran on.
+        """
+        self.sql = sql
+        self.duration = duration
+        self.timestamp = timestamp
+        self.user = user
+        self.database = database
+        self.query = None
+        self.query_dict = None
+        self.error = None
+
+    def __repr__(self):
+        """Return the string representation of the record."""
+        return f"LogRecord({self.duration} ms, {self.sql!r})"
+
+
+def open_log(path, encoding='utf-8'):
+    """Open a log file as a text stream, decompressing it if it is gzipped.
+
+    Parameters
+    ----------
+    path: str
+        Path of the log file.
+    encoding: str
+        Encoding of the log, undecodable bytes are replaced.
+
+    Returns
+    -------
+    stream: :class: `io.TextIOBase`
+    """
+    with open(path, 'rb') as raw_stream:
+        is_gzipped = raw_stream.read(len(__GZIP_MAGIC__)) == __GZIP_MAGIC__
+
+    if is_gzipped:
+        return gzip_open(path, 'rt', encoding=encoding, errors='replace')
+
+    return open(path, 'r', encoding=encoding, errors='replace')
+
+
+class _StatementBuffer:
+    """Line buffer of a statement that stops growing at a byte limit."""
+
+    __slots__ = ('lines', 'size', 'max_bytes', 'encoding', 'is_oversized')
+
+    def __init__(self, max_bytes, encoding='utf-8'):
+        """Initialize the `_StatementBuffer` class.
+
+        Parameters
+        ----------
+        max_bytes: int
+            Encoded size of the statement after which lines are dropped.
+        encoding: str
+            Encoding the size of the lines is measured in.
+        """
+        self.lines = []
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.encoding = encoding
+        self.is_oversized = False
+
+    def append(self, line):
+        """Append a line, dropping it and all the next ones if it exceeds the limit."""
+        if self.is_oversized:
+            return
+
+        size = self.size + len(line.encode(self.encoding, errors='replace'))
+        if size > self.max_bytes:
+            self.lines, self.is_oversized = [], True
+            return
+
+        self.lines.append(line)
+        self.size = size
+
+    def pop(self):
+        """Get the buffered statement, None if it exceeded the limit, and reset the buffer."""
+        sql = None if self.is_oversized else "".join(self.lines).strip()
+        self.lines, self.size, self.is_oversized = [], 0, False
+
+        return sql
+
+
+def _parse_record(record, grammar, limits):
+    """Parse the statement of a record, storing the error if it is invalid."""
+    if record.sql is None:
+        record.error = QueryLimitError("Statement exceeds the size limit", 'max_bytes')
+        return record
+
+    sql = record.sql.rstrip(';').rstrip()
+    try:
+        record.query = Query(normalize_query(sql, grammar), grammar=grammar, limits=limits)
+        record.query_dict = create_query_dict(record.query, compact=True)
+    except (QueryParseError, ValueError) as parse_error:
+        # The lexer raises a ValueError for words that are not valid tokens.
+        record.error = parse_error
+
+    return record
+
+
+def _iter_lines(source, encoding):
+    """Iterate over the lines of a path or a text stream."""
+    if not isinstance(source, str):
+        yield from source
+        return
+
+    with open_log(source, encoding) as stream:
+        yield from stream
+
+
+def _iter_postgres_records(lines, max_statement_bytes, encoding='utf-8'):
+    """Extract the `log_min_duration_statement` records of PostgreSQL log lines."""
+    buffer = _StatementBuffer(max_statement_bytes, encoding)
+    record = None
+
+    for line in lines:
+        # Multi-line statements continue on indented lines.
+        if record is not None and line[:1] in ('\t', ' '):
+            buffer.append(line)
+            continue
+
+        if record is not None:
+            record.sql = buffer.pop()
+            yield record
+            record = None
+
+        match = __POSTGRES_DURATION__.match(line)
+        if match is None:
+            continue
+
+        prefix = match.group('prefix')
+        timestamp = __POSTGRES_TIMESTAMP__.search(prefix)
+        user = __POSTGRES_USER__.search(prefix)
+        record = LogRecord(None, float(match.group('duration')),
+                           timestamp.group() if timestamp else None,
+                           user.group('user') if user else None,
+                           user.group('database') if user else None)
+        buffer.append(line[match.start('sql'):])
+
+    if record is not None:
+        record.sql = buffer.pop()
+        yield record
+
+
+def _iter_mysql_records(lines, max_statement_bytes, encoding='utf-8'):
+    """Extract the records of MySQL slow-query log lines."""
+    buffer = _StatementBuffer(max_statement_bytes, encoding)
+    timestamp, user, database = None, None, None
+    record = None
+
+    for line in lines:
+        if line.startswith('#'):
+            if record is not None:
+                record.sql = buffer.pop()
+                yield record
+                record = None
+
+            match = (__MYSQL_TIME__.match(line) or __MYSQL_USER__.match(line)
+                     or __MYSQL_QUERY_TIME__.match(line))
+            if match is None:
+                continue
+
+            if match.re is __MYSQL_TIME__:
+                timestamp = match.group('timestamp').strip()
+            elif match.re is __MYSQL_USER__:
+                user = match.group('user')
+            else:
+                # Durations are logged in seconds.
+                record = LogRecord(None, float(match.group('duration')) * 1000,
+                                   timestamp, user, database)
+            continue
+
+        if record is None:
+            continue
+
+        if not buffer.lines and not buffer.is_oversized:
+            match = __MYSQL_USE__.match(line)
+            if match is not None:
+                database = record.database = match.group('database')
+                continue
+            if __MYSQL_SET_TIMESTAMP__.match(line):
+                continue
+
+        buffer.append(line)
+
+    if record is not None:
+        record.sql = buffer.pop()
+        yield record
+
+
+def read_postgres_log(source, grammar=None, limits=None, parse=True,
+                      max_statement_bytes=__MAX_STATEMENT_BYTES__, encoding='utf-8'):
+    """Read the statements of a PostgreSQL log.
+
+    Only `log_min_duration_statement` entries (`LOG:  duration: ... ms
+    statement: ...`) are read. The user and database are taken from a
+    `user@db` or `user=...,db=...` log line prefix if there is one. The log is
+    read line by line, so memory is bounded by the size of one statement.
+
+    Parameters
+    ----------
+    source: str or iterable
+        Path of the (optionally gzipped) log file or an iterable of lines.
+    grammar: :class: `grammar.Grammar`
+        Grammar used to parse the statements, defaults to the postgres dialect.
+    limits: :class: `limits.ParseLimits`
+        Resource limits to enforce while parsing.
+    parse: bool
+        Whether to parse the statements into `Query` objects and query dicts.
+    max_statement_bytes: int
+        Statements whose encoded size exceeds this many bytes are not
+        buffered nor parsed.
+    encoding: str
+        Encoding of the log file.
+
+    Yields
+    ------
+    record: :class: `LogRecord`
+    """
+    grammar = grammar or get_grammar('postgres')
+
+    records = _iter_postgres_records(_iter_lines(source, encoding), max_statement_bytes, encoding)
+    for record in records:
+        yield _parse_record(record, grammar, limits) if parse else record
+
+
+def read_mysql_slow_log(source, grammar=None, limits=None, parse=True,
+                        max_statement_bytes=__MAX_STATEMENT_BYTES__, encoding='utf-8'):
+    """Read the statements of a MySQL slow-query log.
+
+    Every `# Query_time:` block is read as one record, `use db;` and `SET
+    timestamp=...;` lines are turned into metadata. The log is read line by
+    line, so memory is bounded by the size of one statement.
+
+    Parameters
+    ----------
+    source: str or iterable
+        Path of the (optionally gzipped) log file or an iterable of lines.
+    grammar: :class: `grammar.Grammar`
+        Grammar used to parse the statements, defaults to the mysql dialect.
+    limits: :class: `limits.ParseLimits`
+        Resource limits to enforce while parsing.
+    parse: bool
+        Whether to parse the statements into `Query` objects and query dicts.
+    max_statement_bytes: int
+        Statements whose encoded size exceeds this many bytes are not
+        buffered nor parsed.
+    encoding: str
+        Encoding of the log file.
+
+    Yields
+    ------
+    record: :class: `LogRecord`
+    """
+    grammar = grammar or get_grammar('mysql')
+
+    records = _iter_mysql_records(_iter_lines(source, encoding), max_statement_bytes, encoding)
+    for record in records:
+        yield _parse_record(record, grammar, limits) if parse else record
+
+
+def latency_by_shape(records):
+    """Aggregate the durations of parsed records by query shape.
+
+    Queries that only differ in their literals share a shape, see
+    `query.Query.shape_hash`. Records that could not be parsed are skipped.
+
+    Parameters
+    ----------
+    records: iterable
+        Parsed `LogRecord` objects.
+
+    Returns
+    -------
+    latencies: dict
+        Dict of shape hash to a dict with the count, total and maximum
+        duration and the SQL of the first record of the shape.
+    """
+    latencies = {}
+
+    for record in records:
+        if record.query is None:
+            continue
+
+        latency = latencies.get(record.query.shape_hash)
+        if latency is None:
+            latencies[record.query.shape_hash] = {
+                'count': 1,
+                'total_duration': record.duration,
+                'max_duration': record.duration,
+                'sql': record.sql,
+            }
+            continue
+
+        latency['count'] += 1
+        latency['total_duration'] += record.duration
+        latency['max_duration'] = max(latency['max_duration'], record.duration)
+
+    return latencies
@@ -1,34 +1,95 @@
 """Module to provide functionalities around queries"""
 
-from collections import deque
+from copy import copy
+from io import StringIO
+from itertools import islice
+from re import compile as regex_compile
+from sys import intern
 
+from sqlparser.emitters import write_query
 from sqlparser.exceptions import QueryParseError
 from sqlparser.filters import QueryFilter
-from sqlparser.tokens import __TOKEN_TYPES__ as token_type_dict
-from sqlparser.tokens import Identifier, Keyword
-from sqlparser.utils import get_token_class, merge_consequtive_keywords
+from sqlparser.grammar import __DEFAULT_GRAMMAR__, __TOKEN_CLASSES__
+from sqlparser.hashing import get_structural_hashes
+from sqlparser.limits import ParseLimits
+from sqlparser.tokens import (Identifier, Keyword, LiteralList, Number, Separator,
+                              String, Token)
+
+__MIN_LITERAL_LIST_LENGTH__ = 2
+__NUMBER_LITERAL__ = regex_compile(r"[0-9]+\Z")
+# Number of literals of a literal list scanned between two deadline checks.
+__DEADLINE_CHECK_INTERVAL__ = 1024
 
 
 class Query:
     """Class to represent a SQL query as atomic token objects."""
 
-    def __init__(self, query=None, tokens=None):
+    def __init__(self, query=None, tokens=None, limits=None, guard=None, depth=0,
+                 grammar=None, pool=None, counters=None, token_pool=None):
         """Initialize the `Query` class.
 
         Parameters
         ----------
         query: str
             SQL query to be parsed.
+        tokens: list
+            Already parsed tokens of the query.
+        limits: :class: `limits.ParseLimits`
+            Resource limits to enforce while parsing.
+        guard: :class: `limits.ParseGuard`
+            Guard shared with the parent query, used for subqueries.
+        depth: int
+            Subquery nesting depth of the query.
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar (dialect) used to tokenize the query.
+        pool: :class: `hashing.SubqueryPool`
+            Pool used to share structurally identical subqueries.
+        counters: :class: `counters.ParseCounters`
+            Counters of the internal operations, counting is disabled if None.
+        token_pool: :class: `interning.TokenPool`
+            Pool used to share identical tokens, tokens are not shared if None.
         """
         self.query = query or ""
         self.tokens = tokens or list()
+        self.depth = depth
+        self.grammar = grammar or __DEFAULT_GRAMMAR__
+        self.guard = guard or (limits or ParseLimits()).guard()
+        self.pool = pool
+        self.counters = counters
+        self.token_pool = token_pool
+        self.compact_dict = None
+
+        if self.counters is not None:
+            self.counters.queries += 1
+
+        self.guard.check_depth(self.depth)
 
         if not self.tokens:
             # Deconstruct the query to get individual tokens.
             self._get_tokens_from_query()
 
         self.subquery = self.process_subqueries()  # Process subqueries.
-        merge_consequtive_keywords(self)
+
+        # Subqueries are hashed before their parent, so the hash is built
+        # bottom-up over the tree.
+        self.structural_hash, self.shape_hash = get_structural_hashes(
+            self.tokens)
+
+        # The deadline bounds the parse only, later conversions of a parsed
+        # query must not fail once it has passed.
+        if guard is None:
+            self.guard.disarm()
+
+    def __eq__(self, other):
+        """Check if two queries are structurally identical."""
+        if not isinstance(other, Query):
+            return NotImplemented
+
+        return self.structural_hash == other.structural_hash
+
+    def __hash__(self):
+        """Return the hash of the query structure."""
+        return hash(self.structural_hash)
 
     def __iter__(self):
         """Iterate over the tokens in the query."""
@@ -43,112 +104,278 @@ class Query:
         return " ".join([str(token) for token in self.tokens])
 
     def _get_tokens_from_query(self):
-        """Deconstruct the query to get individual tokens."""
-        _string_tokens = self.query.split(" ")
+        """Deconstruct the query to get individual tokens.
 
-        for string_token in _string_tokens:
-            if string_token == "":
+        Multi-word keywords like `GROUP BY` are matched against the keyword
+        trie while scanning, so no separate merge pass is required.
+        """
+        self.guard.check_bytes(self.query)
+        _string_tokens = self.query.split()
+        idx = 0
+        counters = self.counters
+        token_pool = self.token_pool
+        # Literal lists count as one token per literal towards the limit.
+        token_count = 0
+
+        while idx < len(_string_tokens):
+            self.guard.check_tokens(token_count + 1)
+            self.guard.check_deadline()
+
+            literal_list, next_idx = self._match_literal_list(_string_tokens, idx, token_count)
+
+            if literal_list is not None:
+                self.tokens.append(literal_list)
+                token_count += len(literal_list)
+                idx = next_idx
                 continue
-            token_class = get_token_class(string_token)
-            self.tokens.append(token_class(string_token))
-
-    def process_subqueries(self):
-        """Return the subqueries of the query."""
-        begin_token_values = ['SELECT', 'DELETE', 'UPDATE',
-                              'INSERT', 'CREATE', 'DROP', 'ALTER', 'TRUNCATE']
-        seperators = ['(', ')']
-        subquery = None
 
-        for idx, token in enumerate(self.tokens):
-            current_token = token.value
-            next_token = self.tokens[idx +
-                                     1].value if idx < len(self.tokens) - 1 else None
+            token_count += 1
 
-            subquery_conditions = [current_token == seperators[0],
-                                   next_token in begin_token_values, ]
+            keyword, next_idx = self.grammar.match_keyword(
+                _string_tokens, idx)
 
-            if all(subquery_conditions):
-                subquery_start_idx, subquery_end_idx = self._get_subquery(idx)
+            if keyword is not None:
+                if token_pool is not None and 'keyword' in token_pool.token_types:
+                    self.tokens.append(token_pool.get(Keyword, keyword, self.grammar, counters))
+                else:
+                    self.tokens.append(Keyword(keyword, grammar=self.grammar, counters=counters))
+                idx = next_idx
+                continue
 
-                if subquery_end_idx == -1:
-                    raise QueryParseError(
-                        f"Unbalanced subquery at index {subquery_start_idx}"
-                        f", {[token.value for token in self.tokens[subquery_start_idx:]]}")
+            string_token = _string_tokens[idx]
+            token_type = self.grammar.token_type(string_token, counters)
+            token_class = __TOKEN_CLASSES__[token_type]
+            idx += 1
 
-                subquery = Query(
-                    tokens=self.tokens[subquery_start_idx + 1:subquery_end_idx])
+            if token_pool is not None and token_type in token_pool.token_types:
+                # Values are only validated when the pool creates the token.
+                self.tokens.append(token_pool.get(token_class, string_token, self.grammar,
+                                                  counters))
+                continue
 
-                for subquery_token in self.tokens[subquery_start_idx:subquery_end_idx + 1]:
-                    self.tokens.remove(subquery_token)
+            self.tokens.append(token_class(string_token, grammar=self.grammar, counters=counters))
 
-                self.tokens.insert(subquery_start_idx, subquery)
+        if counters is not None:
+            counters.tokens += len(self.tokens)
 
-        if not subquery:
-            return self.tokens
+    def _match_literal_list(self, string_tokens, start_idx, token_count=0):
+        """Match a homogeneous list of literals starting at `start_idx`.
 
-    def _get_subquery(self, start_idx):
-        """Get the index range of a subquery
+        Lists like `( 1 , 2 , 3 )` or `( 'a', 'b' )`, e.g. of IN or VALUES,
+        are collapsed into a single `LiteralList` token.
 
         Parameters
         ----------
+        string_tokens: list
+            List of space separated words of the query.
         start_idx: int
-            Start index of the subquery
+            Index of the word to start matching from.
+        token_count: int
+            Number of tokens before the list, checked against the limits.
 
         Returns
         -------
         tuple
-            Tuple containing the start and end index of the subquery.
+            Tuple containing the `LiteralList` (or None) and the index of the
+            first word after the list.
         """
-        token_deque = deque()
+        if string_tokens[start_idx] != '(':
+            return None, start_idx
 
-        for i in range(start_idx, len(self.tokens)):
-            if self.tokens[i].value == ')':
-                token_deque.popleft()
+        values = []
+        literal_class = None
+        expects_literal = True
 
-            elif self.tokens[i].value == '(':
-                token_deque.append(self.tokens[i])
+        for idx in range(start_idx + 1, len(string_tokens)):
+            string_token = string_tokens[idx]
 
-            if not token_deque:
-                return start_idx, i
+            if not expects_literal:
+                if string_token == ')':
+                    break
+                if string_token != ',':
+                    return None, start_idx
+                expects_literal = True
+                continue
 
-        return (start_idx, -1)
+            # Commas may be attached to the literal, `( 1, 2 )`.
+            value = string_token[:-1] if string_token.endswith(',') else string_token
+            if self.counters is not None:
+                self.counters.regex_evaluations += 1
+            if __NUMBER_LITERAL__.match(value):
+                value_class = Number
+            elif len(value) > 1 and value[0] == value[-1] == "'" and "'" not in value[1:-1]:
+                value_class = String
+            else:
+                return None, start_idx
 
+            if literal_class not in (None, value_class):
+                return None, start_idx
+
+            literal_class = value_class
+            values.append(value)
+            expects_literal = value != string_token
+
+            self.guard.check_tokens(token_count + len(values))
+            if not len(values) % __DEADLINE_CHECK_INTERVAL__:
+                self.guard.check_deadline()
+        else:
+            return None, start_idx
+
+        if len(values) < __MIN_LITERAL_LIST_LENGTH__:
+            return None, start_idx
+
+        return LiteralList(values, literal_class, grammar=self.grammar), idx + 1
+
+    def process_subqueries(self):
+        """Return the subqueries of the query.
 
-def create_query_dict(query):
+        The tokens are scanned once, keeping a stack of the open parentheses.
+        A subquery is built as soon as its closing parenthesis is found, so
+        nested subqueries are built innermost first without recursion.
+        """
+        begin_token_values = ['SELECT', 'DELETE', 'UPDATE', 'INSERT',
+                              'INSERT INTO', 'CREATE', 'DROP', 'ALTER', 'TRUNCATE']
+        seperators = ['(', ')']
+        subquery = None
+
+        tokens = []
+        # One entry per open parenthesis, the start index and the tokens of
+        # the enclosing level for subqueries, None for plain parentheses.
+        open_parentheses = []
+        subquery_depth = 0
+        subquery_count = 0
+
+        for idx, token in enumerate(self.tokens):
+            self.guard.check_deadline()
+            # Tokens may already contain subqueries, which have no value, and
+            # the value of a literal list is built on every access.
+            current_token = token.value if isinstance(token, Separator) else None
+
+            if current_token == seperators[0]:
+                next_token = self.tokens[idx + 1] if idx < len(self.tokens) - 1 else None
+                next_token = next_token.value if isinstance(next_token, Keyword) else None
+
+                if next_token in begin_token_values:
+                    open_parentheses.append((idx, tokens))
+                    tokens = []
+                    subquery_depth += 1
+                    continue
+
+                open_parentheses.append(None)
+
+            elif current_token == seperators[1] and open_parentheses:
+                enclosing_level = open_parentheses.pop()
+
+                if enclosing_level is not None:
+                    subquery = Query(tokens=tokens, guard=self.guard,
+                                     depth=self.depth + subquery_depth,
+                                     grammar=self.grammar, pool=self.pool,
+                                     counters=self.counters, token_pool=self.token_pool)
+                    subquery_depth -= 1
+                    subquery_count += 1
+
+                    if self.pool is not None:
+                        subquery = self.pool.intern(subquery)
+
+                    tokens = enclosing_level[1]
+                    tokens.append(subquery)
+                    continue
+
+            tokens.append(token)
+
+        for enclosing_level in open_parentheses:
+            if enclosing_level is not None:
+                subquery_start_idx = enclosing_level[0]
+                subquery_values = [getattr(token, 'value', token)
+                                   for token in self.tokens[subquery_start_idx:]]
+                raise QueryParseError(
+                    f"Unbalanced subquery at index {subquery_start_idx}, {subquery_values}")
+
+        if self.counters is not None:
+            # The token list is rebuilt once, plus one list is collected per
+            # subquery whose two parentheses are dropped.
+            self.counters.list_copies += 1 + subquery_count
+            self.counters.removals += 2 * subquery_count
+
+        self.tokens = tokens
+
+        if not subquery:
+            return self.tokens
+
+
+def create_query_dict(query, compact=False):
     """Create a dictionary from a query.
 
     Paramters
     ---------
     query: Query
         Query that is to be converted
+    compact: bool
+        Whether to emit plain data, i.e. tuples of interned strings instead
+        of lists of `Token` objects. The compact dict is JSON-serializable
+        and does not keep the tokens of the query alive.
 
     Returns
     -------
     dict
     """
+    if compact and query.compact_dict is not None:
+        return query.compact_dict
+
     query_dict = {}
     for token in query.tokens:
         if isinstance(token, Keyword):
             query_dict[token.value] = []
 
+    # The filters replace the tokens of the query they are given, filter a
+    # shallow copy so the query, and thus its hashes, stay unchanged.
     query_filter = QueryFilter()
-    query = query_filter(query)
+    tokens = query_filter(copy(query)).tokens
 
-    for token in query.tokens:
+    for token_idx, token in enumerate(tokens):
         if isinstance(token, Keyword):
-            for token_pair in query.tokens[query.tokens.index(token) + 1:]:
+            for token_pair in islice(tokens, token_idx + 1, None):
                 if isinstance(token_pair, Keyword):
                     break
 
                 if isinstance(token_pair, Query):
-                    token_pair = create_query_dict(token_pair)
+                    token_pair = create_query_dict(token_pair, compact)
 
                 if isinstance(token_pair, Identifier):
                     separated_tokens = token_pair.value.split("(")
-                    if separated_tokens[0] in token_type_dict["aggregate"]:
-                        token_pair = {
-                            separated_tokens[0]: separated_tokens[1][:-1]}
+                    if separated_tokens[0] in query.grammar.token_types["aggregate"]:
+                        token_pair = {intern(separated_tokens[0]):
+                                      intern(separated_tokens[1][:-1])}
+
+                if compact and isinstance(token_pair, LiteralList):
+                    token_pair = tuple(token_pair)
+                elif compact and isinstance(token_pair, Token):
+                    token_pair = intern(token_pair.value)
 
                 query_dict[token.value].append(token_pair)
 
+    if compact:
+        query.compact_dict = {intern(key): tuple(value)
+                              for key, value in query_dict.items()}
+        return query.compact_dict
+
     return query_dict
+
+
+def create_query_string(query):
+    """Create SQL text from a query.
+
+    Parameters
+    ----------
+    query: Query
+        Query that is to be converted
+
+    Returns
+    -------
+    str
+        Space separated SQL text that parses back to the same query.
+    """
+    stream = StringIO()
+    write_query(query, stream)
+
+    return stream.getvalue()
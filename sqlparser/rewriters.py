@@ -0,0 +1,539 @@
+"""Rewrite queries into cheaper but equivalent queries."""
+from io import StringIO
+from re import compile as regex_compile
+
+from sqlparser.constants import __COLUMN_REFERENCE__, __NON_COLUMN_WORDS__
+from sqlparser.emitters import write_query
+from sqlparser.query import Query
+from sqlparser.tokens import (Identifier, Keyword, LiteralList, Number, Operator,
+                              Separator, String, Token)
+
+__COLUMN_NAME__ = regex_compile(r"[A-Za-z_][A-Za-z0-9_.]*,?$")
+__PREDICATE_KEYWORDS__ = frozenset(['AND', 'OR', 'NOT', 'LIKE', 'IN'])
+# Words that change the row set of a derived table when they are not
+# recognized as keywords by the grammar.
+__BLOCKING_WORDS__ = frozenset(['LIMIT', 'OFFSET', 'FETCH', 'TOP', 'DISTINCT', 'HAVING',
+                                'UNION', 'GROUP', 'ORDER', 'OVER', 'WINDOW'])
+__MERGEABLE_CLAUSES__ = frozenset(['SELECT', 'FROM', 'WHERE'])
+__PUSHDOWN_CLAUSES__ = frozenset(['SELECT', 'FROM', 'WHERE', 'GROUP BY', 'ORDER BY'])
+__PLACEHOLDER_STYLES__ = {
+    'qmark': lambda position: "?",
+    'dollar': lambda position: f"${position}",
+    'format': lambda position: "%s",
+}
+# Literals and `%` signs inside identifiers, e.g. `height>100` or `name='bob'`.
+__EMBEDDED_LITERAL__ = regex_compile(
+    r"(?P<string>'(?:[^']|'')*')"
+    r"|(?<![A-Za-z0-9_.$])(?P<number>[0-9]+(?:\.[0-9]+)?)(?![A-Za-z0-9_$])"
+    r"|(?P<percent>%)")
+__DIALECT_PLACEHOLDER_STYLES__ = {
+    'default': 'qmark',
+    'mysql': 'format',
+    'postgres': 'dollar',
+}
+
+
+def _split_clauses(tokens):
+    """Split tokens into `[keyword, body]` clauses.
+
+    Predicate keywords like AND or LIKE are part of the clause body. Tokens
+    before the first keyword are stored under a `None` keyword.
+    """
+    clauses = []
+
+    for token in tokens:
+        if isinstance(token, Keyword) and token.value not in __PREDICATE_KEYWORDS__:
+            clauses.append([token, []])
+        elif clauses:
+            clauses[-1][1].append(token)
+        else:
+            clauses.append([None, [token]])
+
+    return clauses
+
+
+def _join_clauses(clauses):
+    """Join `[keyword, body]` clauses back into a list of tokens."""
+    tokens = []
+
+    for keyword, body in clauses:
+        if keyword is not None:
+            tokens.append(keyword)
+        tokens.extend(body)
+
+    return tokens
+
+
+def _get_clause(clauses, keyword_value):
+    """Get the clause with the given keyword, None if there is none."""
+    for clause in clauses:
+        if clause[0] is not None and clause[0].value == keyword_value:
+            return clause
+
+    return None
+
+
+def _get_column_names(tokens):
+    """Get the plain column names of a select list, None if it has expressions.
+
+    A `*` select list returns an empty set. Columns must be comma separated,
+    `a b` (an implicit alias) is not a plain select list.
+    """
+    if len(tokens) == 1 and isinstance(tokens[0], Operator) and tokens[0].value == '*':
+        return set()
+
+    column_names = set()
+    for idx, token in enumerate(tokens):
+        if not (isinstance(token, Identifier) and __COLUMN_NAME__.match(token.value)):
+            return None
+        if token.value.upper() in ('AS', 'DISTINCT'):
+            return None
+        if token.value.endswith(',') == (idx == len(tokens) - 1):
+            return None
+
+        column_names.add(token.value.rstrip(','))
+
+    return column_names or None
+
+
+def _get_plain_select_columns(tokens):
+    """Get the plain, unaliased column names of a select list.
+
+    Expressions are skipped and names that are used as an alias, `b as a` or
+    `b a`, are removed, as they do not refer to the column of that name.
+    """
+    items = [[]]
+    depth = 0
+
+    for token in tokens:
+        if isinstance(token, Separator) and token.value in ('(', ')'):
+            depth += 1 if token.value == '(' else -1
+        elif depth == 0 and isinstance(token, Separator) and token.value == ',':
+            items.append([])
+            continue
+
+        items[-1].append(token)
+        if depth == 0 and isinstance(token, Identifier) and token.value.endswith(','):
+            items.append([])
+
+    column_names, alias_names = set(), set()
+    for item in items:
+        if not item or not isinstance(item[-1], Identifier):
+            continue
+
+        name = item[-1].value.rstrip(',')
+        if not __COLUMN_NAME__.match(name):
+            continue
+
+        (column_names if len(item) == 1 else alias_names).add(name)
+
+    return column_names - alias_names
+
+
+def _get_referenced_columns(tokens, grammar):
+    """Get the column names that are referenced in a list of tokens."""
+    referenced_columns = set()
+    is_alias = False
+
+    for token in tokens:
+        if not isinstance(token, Identifier):
+            is_alias = False
+            continue
+
+        if is_alias or token.value.lower() == 'as':
+            is_alias = not is_alias
+            continue
+
+        referenced_columns.update(
+            name for name in __COLUMN_REFERENCE__.findall(token.value)
+            if name not in grammar.token_types['aggregate']
+            and name.upper() not in __NON_COLUMN_WORDS__)
+
+    return referenced_columns
+
+
+def _has_blocking_words(query):
+    """Check if a query has words that make it unsafe to rewrite."""
+    return any(isinstance(token, Identifier) and token.value.upper() in __BLOCKING_WORDS__
+               for token in query.tokens)
+
+
+def _has_top_level_or(tokens):
+    """Check if a predicate has an OR that is not inside parentheses."""
+    depth = 0
+
+    for token in tokens:
+        if isinstance(token, Separator) and token.value in ('(', ')'):
+            depth += 1 if token.value == '(' else -1
+        elif depth == 0 and isinstance(token, Keyword) and token.value == 'OR':
+            return True
+
+    return False
+
+
+def _split_conjuncts(tokens):
+    """Split a predicate on its top-level ANDs."""
+    if _has_top_level_or(tokens):
+        return [tokens]
+
+    conjuncts = [[]]
+    depth = 0
+    in_between = False
+
+    for token in tokens:
+        if isinstance(token, Separator) and token.value in ('(', ')'):
+            depth += 1 if token.value == '(' else -1
+        elif isinstance(token, Identifier) and token.value.upper() == 'BETWEEN':
+            in_between = True
+        elif depth == 0 and isinstance(token, Keyword) and token.value == 'AND':
+            if not in_between:
+                conjuncts.append([])
+                continue
+            in_between = False
+
+        conjuncts[-1].append(token)
+
+    return [conjunct for conjunct in conjuncts if conjunct]
+
+
+def _join_conjuncts(conjuncts, grammar):
+    """Join predicates with ANDs, parenthesizing the ones that contain an OR."""
+    tokens = []
+
+    for conjunct in conjuncts:
+        if tokens:
+            tokens.append(Keyword('AND', grammar=grammar))
+
+        if len(conjuncts) > 1 and _has_top_level_or(conjunct):
+            tokens.append(Separator('(', grammar=grammar))
+            tokens.extend(conjunct)
+            tokens.append(Separator(')', grammar=grammar))
+        else:
+            tokens.extend(conjunct)
+
+    return tokens
+
+
+def _set_where_clause(clauses, conjuncts, grammar):
+    """Set the WHERE clause of a query, placing a new one after FROM/JOINs."""
+    where_clause = _get_clause(clauses, 'WHERE')
+
+    if not conjuncts:
+        if where_clause is not None:
+            clauses.remove(where_clause)
+        return
+
+    if where_clause is None:
+        insert_idx = len(clauses)
+        for idx, (keyword, _) in enumerate(clauses):
+            if keyword is not None and keyword.value in ('GROUP BY', 'ORDER BY'):
+                insert_idx = idx
+                break
+
+        where_clause = [Keyword('WHERE', grammar=grammar), []]
+        clauses.insert(insert_idx, where_clause)
+
+    where_clause[1] = _join_conjuncts(conjuncts, grammar)
+
+
+def _merge_derived_table(clauses, subquery, grammar):
+    """Merge a simple derived table into the outer query.
+
+    Returns the merged clauses, None if merging would not be safe.
+    """
+    subquery_clauses = _split_clauses(subquery.tokens)
+    subquery_keywords = [keyword.value if keyword is not None else None
+                         for keyword, _ in subquery_clauses]
+
+    if (len(set(subquery_keywords)) != len(subquery_keywords)
+            or not set(subquery_keywords) <= __MERGEABLE_CLAUSES__
+            or _has_blocking_words(subquery)):
+        return None
+
+    subquery_select = _get_clause(subquery_clauses, 'SELECT')
+    subquery_from = _get_clause(subquery_clauses, 'FROM')
+    if subquery_select is None or subquery_from is None or any(
+            not isinstance(token, Token) for _, body in subquery_clauses for token in body):
+        return None
+
+    # Only a single table, optionally with an alias, can be merged.
+    if not (1 <= len(subquery_from[1]) <= 2 and all(
+            isinstance(token, Identifier) and __COLUMN_NAME__.match(token.value)
+            and not token.value.endswith(',') for token in subquery_from[1])):
+        return None
+
+    column_names = _get_column_names(subquery_select[1])
+    if column_names is None:
+        return None
+
+    outer_tokens = [token for keyword, body in clauses
+                    if keyword is None or keyword.value != 'FROM' for token in body]
+    if column_names and not _get_referenced_columns(outer_tokens, grammar) <= column_names:
+        return None
+
+    merged_clauses = [[keyword, list(body)] for keyword, body in clauses]
+    select_clause = _get_clause(merged_clauses, 'SELECT')
+    if select_clause is not None and _get_column_names(select_clause[1]) == set():
+        select_clause[1] = list(subquery_select[1])
+
+    _get_clause(merged_clauses, 'FROM')[1] = list(subquery_from[1])
+
+    subquery_where = _get_clause(subquery_clauses, 'WHERE')
+    outer_where = _get_clause(merged_clauses, 'WHERE')
+    conjuncts = []
+    for where_clause in (subquery_where, outer_where):
+        if where_clause is not None:
+            conjuncts.extend(_split_conjuncts(where_clause[1]))
+
+    _set_where_clause(merged_clauses, conjuncts, grammar)
+
+    return merged_clauses
+
+
+def _push_down_predicates(clauses, subquery, grammar):
+    """Push outer WHERE predicates down into a derived table.
+
+    Only predicates that reference nothing but the derived table's group by
+    columns (or plain columns if it is not grouped) are pushed down. A group
+    by column must also be selected as is, outside the derived table a name
+    refers to its select list, which may alias another column to that name.
+    Returns the rewritten clauses, None if nothing could be pushed down.
+    """
+    outer_where = _get_clause(clauses, 'WHERE')
+    subquery_clauses = _split_clauses(subquery.tokens)
+    if outer_where is None or _has_blocking_words(subquery) or any(
+            keyword is None or not (keyword.value in __PUSHDOWN_CLAUSES__
+                                    or keyword.value.endswith('JOIN'))
+            for keyword, _ in subquery_clauses):
+        return None
+
+    select_clause = _get_clause(subquery_clauses, 'SELECT')
+    group_by_clause = _get_clause(subquery_clauses, 'GROUP BY')
+    if select_clause is None:
+        return None
+
+    if group_by_clause is not None:
+        pushable_columns = _get_column_names(group_by_clause[1])
+        if pushable_columns:
+            pushable_columns &= _get_plain_select_columns(select_clause[1])
+    else:
+        pushable_columns = _get_column_names(select_clause[1])
+
+    if not pushable_columns:
+        return None
+
+    pushed_conjuncts, kept_conjuncts = [], []
+    for conjunct in _split_conjuncts(outer_where[1]):
+        referenced_columns = _get_referenced_columns(conjunct, grammar)
+        is_pushable = (referenced_columns and referenced_columns <= pushable_columns
+                       and all(isinstance(token, Token) for token in conjunct))
+        (pushed_conjuncts if is_pushable else kept_conjuncts).append(conjunct)
+
+    if not pushed_conjuncts:
+        return None
+
+    subquery_clauses = [[keyword, list(body)] for keyword, body in subquery_clauses]
+    subquery_where = _get_clause(subquery_clauses, 'WHERE')
+    if subquery_where is not None:
+        pushed_conjuncts = _split_conjuncts(subquery_where[1]) + pushed_conjuncts
+    _set_where_clause(subquery_clauses, pushed_conjuncts, grammar)
+
+    rewritten_clauses = [[keyword, list(body)] for keyword, body in clauses]
+    _get_clause(rewritten_clauses, 'FROM')[1] = [
+        Query(tokens=_join_clauses(subquery_clauses), grammar=grammar)]
+    _set_where_clause(rewritten_clauses, kept_conjuncts, grammar)
+
+    return rewritten_clauses
+
+
+def _flatten_query(tokens, grammar):
+    """Flatten the derived table of a query whose subqueries are flattened.
+
+    Returns a tuple of the flattened query and None, or None and the
+    rewritten tokens if the query was rewritten and has to be flattened again.
+    """
+    clauses = _split_clauses(tokens)
+
+    from_clause = _get_clause(clauses, 'FROM')
+    has_joins = any(keyword is not None and keyword.value.endswith('JOIN')
+                    for keyword, _ in clauses)
+
+    if (from_clause is not None and not has_joins and len(from_clause[1]) == 1
+            and not isinstance(from_clause[1][0], Token)):
+        subquery = from_clause[1][0]
+        rewritten_clauses = (_merge_derived_table(clauses, subquery, grammar)
+                             or _push_down_predicates(clauses, subquery, grammar))
+
+        if rewritten_clauses is not None:
+            return None, _join_clauses(rewritten_clauses)
+
+    return Query(tokens=tokens, grammar=grammar), None
+
+
+def flatten_subqueries(query):
+    """Flatten derived tables of a query.
+
+    Simple derived tables (a plain projection and filter of a table) are
+    merged into the outer query. Otherwise the outer WHERE predicates that
+    only reference the derived table's grouping or plain columns are pushed
+    down into it. Subqueries are rewritten first, the query itself is not
+    modified.
+
+    Parameters
+    ----------
+    query: :class: `query.Query`
+        The query that is to be rewritten.
+
+    Returns
+    -------
+    query: :class: `query.Query`
+        The rewritten query, use `query.create_query_string` to emit it.
+    """
+    # Ids of the queries that are already flattened, they are kept alive by
+    # the token lists on the stack.
+    flattened_ids = set()
+    # Stack of `[query, token iterator, flattened tokens]`, subqueries are
+    # flattened before their parent without recursion.
+    query_stack = [[query, iter(query.tokens), []]]
+    flattened_query = None
+
+    while query_stack:
+        current_query, token_iterator, tokens = query_stack[-1]
+        token = next(token_iterator, None)
+
+        if token is not None:
+            if isinstance(token, Token) or id(token) in flattened_ids:
+                tokens.append(token)
+            else:
+                query_stack.append([token, iter(token.tokens), []])
+            continue
+
+        query_stack.pop()
+        flattened_query, rewritten_tokens = _flatten_query(tokens, current_query.grammar)
+
+        if rewritten_tokens is not None:
+            # Rewriting can expose another derived table, flatten it as well.
+            rewritten_query = Query(tokens=rewritten_tokens, grammar=current_query.grammar)
+            query_stack.append([rewritten_query, iter(rewritten_query.tokens), []])
+            continue
+
+        flattened_ids.add(id(flattened_query))
+        if query_stack:
+            query_stack[-1][2].append(flattened_query)
+
+    return flattened_query
+
+
+def _get_literal_value(token_class, value):
+    """Convert the SQL text of a literal into a Python value."""
+    if token_class is String:
+        return value[1:-1].replace("''", "'")
+
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+class ParameterizedQuery:
+    """Query template with positional placeholders and its parameters.
+
+    Templates are compared and hashed by their text only, so queries that
+    only differ in their literals are equal and can share a prepared
+    statement.
+    """
+
+    __slots__ = ('template', 'parameters', 'style')
+
+    def __init__(self, template, parameters, style):
+        """Initialize the `ParameterizedQuery` class.
+
+        Parameters
+        ----------
+        template: str
+            SQL text with a placeholder in place of every literal.
+        parameters: tuple
+            Values of the literals in placeholder order.
+        style: str
+            Placeholder style of the template, qmark, dollar or format.
+        """
+        self.template = template
+        self.parameters = parameters
+        self.style = style
+
+    def __eq__(self, other):
+        """Check if two parameterized queries have the same template."""
+        if not isinstance(other, ParameterizedQuery):
+            return NotImplemented
+
+        return self.template == other.template
+
+    def __hash__(self):
+        """Hash of the template."""
+        return hash(self.template)
+
+    def __repr__(self):
+        """Return the string representation of the parameterized query."""
+        return f"ParameterizedQuery({self.template!r}, {self.parameters!r})"
+
+
+def parameterize(query, style=None):
+    """Replace the literals of a query with positional placeholders.
+
+    Every `Number` and `String` literal, including the elements of literal
+    lists, the literals of subqueries and literals attached to an operator
+    like `height>100`, is replaced in a single pass over the query tree. In
+    the format style the `%` operator is escaped as `%%`.
+
+    Parameters
+    ----------
+    query: :class: `query.Query`
+        The query that is to be parameterized.
+    style: str
+        Placeholder style, qmark (`?`), dollar (`$1`) or format (`%s`).
+        Defaults to the style of the query's dialect.
+
+    Returns
+    -------
+    parameterized_query: :class: `ParameterizedQuery`
+    """
+    if style is None:
+        style = __DIALECT_PLACEHOLDER_STYLES__.get(query.grammar.name, 'qmark')
+
+    try:
+        get_placeholder = __PLACEHOLDER_STYLES__[style]
+    except KeyError:
+        raise ValueError(f"Unknown placeholder style: {style}")
+
+    parameters = []
+
+    def get_parameter_placeholder(literal_class, value):
+        parameters.append(_get_literal_value(literal_class, value))
+        return get_placeholder(len(parameters))
+
+    def replace_embedded_literal(match):
+        if match.lastgroup == 'percent':
+            return '%%' if style == 'format' else '%'
+
+        literal_class = String if match.lastgroup == 'string' else Number
+        return get_parameter_placeholder(literal_class, match.group())
+
+    def format_token(token):
+        if isinstance(token, LiteralList):
+            return "( " + " , ".join(get_parameter_placeholder(token.literal_class, value)
+                                     for value in token) + " )"
+        if isinstance(token, (Number, String)):
+            return get_parameter_placeholder(token.__class__, token.value)
+        if isinstance(token, Identifier):
+            # Literals attached to an operator are part of the identifier,
+            # `height>100` or `name='bob'`.
+            return __EMBEDDED_LITERAL__.sub(replace_embedded_literal, token.value)
+        if style == 'format':
+            return token.value.replace('%', '%%')
+
+        return token.value
+
+    template = StringIO()
+    write_query(query, template, format_token)
+
+    return ParameterizedQuery(template.getvalue(), tuple(parameters), style)
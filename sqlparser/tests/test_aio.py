@@ -0,0 +1,100 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy.testing as npt
+
+from sqlparser.aio import AsyncParser, StatementSplitter, aparse
+from sqlparser.exceptions import QueryLimitError
+from sqlparser.limits import ParseLimits
+from sqlparser.query import Query
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_statement_splitter():
+    splitter = StatementSplitter()
+
+    npt.assert_equal(splitter.feed("SELECT a FROM t WHERE b = 'x;"), [])
+    npt.assert_equal(splitter.feed("y'; ;SELECT b"),
+                     ["SELECT a FROM t WHERE b = 'x;y'"])
+    npt.assert_equal(splitter.feed(" FROM u;SELECT c"), ["SELECT b FROM u"])
+    npt.assert_equal(splitter.flush(), "SELECT c")
+    npt.assert_equal(splitter.flush(), None)
+
+    npt.assert_equal(splitter.feed("SELECT id FROM t -- don't\n; SELECT id FROM u; /* ; '"),
+                     ["SELECT id FROM t -- don't\n", " SELECT id FROM u"])
+    npt.assert_equal(splitter.feed(" */ SELECT 1 -"), [])
+    npt.assert_equal(splitter.feed("- ;\n;-- ;"), [" /* ; ' */ SELECT 1 -- ;\n"])
+    npt.assert_equal(splitter.flush(), None)
+
+    # Oversized statements are replaced by an error, the others are kept.
+    splitter = StatementSplitter(max_bytes=16)
+    npt.assert_equal(splitter.feed("SELECT 1;SELECT id FROM person"), ["SELECT 1"])
+    statements = splitter.feed(" WHERE id > 1;SELECT 2;")
+    npt.assert_equal(isinstance(statements[0], QueryLimitError), True)
+    npt.assert_equal(statements[1:], ["SELECT 2"])
+
+    # The limit is on the encoded size, not on the number of characters.
+    splitter = StatementSplitter(max_bytes=16)
+    statements = splitter.feed("SELECT 'ééééé';SELECT 'éé';")
+    npt.assert_equal(isinstance(statements[0], QueryLimitError), True)
+    npt.assert_equal(statements[1:], ["SELECT 'éé'"])
+
+    # Long statements are buffered in chunks, each chunk is scanned once.
+    splitter = StatementSplitter()
+    for _ in range(1000):
+        npt.assert_equal(splitter.feed("SELECT a FROM t WHERE a = 'x' "), [])
+    npt.assert_equal(len(splitter._chunks), 1000)
+    npt.assert_equal(splitter.feed(";")[0], "SELECT a FROM t WHERE a = 'x' " * 1000)
+
+
+def test_aparse():
+    query = run(aparse("SELECT id FROM person"))
+    npt.assert_equal(query == Query("SELECT id FROM person"), True)
+
+    parser = AsyncParser(executor=ThreadPoolExecutor(2), inline_threshold=0)
+    query = run(parser.parse("SELECT id FROM ( SELECT id FROM person )"))
+    npt.assert_equal(query == Query("SELECT id FROM ( SELECT id FROM person )"), True)
+
+
+def test_parse_stream():
+    statements = [f"SELECT id{idx}\nFROM person" for idx in range(20)]
+
+    async def parse_stream():
+        reader = asyncio.StreamReader()
+        reader.feed_data(";\n".join(statements).encode())
+        reader.feed_eof()
+
+        parser = AsyncParser(inline_threshold=0, max_in_flight=3)
+        return [query async for query in parser.parse_stream(reader)]
+
+    queries = run(parse_stream())
+
+    npt.assert_equal(len(queries), len(statements))
+    for query, statement in zip(queries, statements):
+        npt.assert_equal(query == Query(statement), True)
+
+
+def test_parse_stream_errors():
+    async def parse_stream():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"SELECT id FROM person;SELECT $1;SELECT "
+                         + b"c, " * 100 + b"d FROM t;SELECT name FROM person")
+        reader.feed_eof()
+
+        parser = AsyncParser(limits=ParseLimits(max_bytes=64))
+        return [query async for query in parser.parse_stream(reader)]
+
+    queries = run(parse_stream())
+
+    npt.assert_equal(len(queries), 4)
+    npt.assert_equal(queries[0] == Query("SELECT id FROM person"), True)
+    npt.assert_equal(isinstance(queries[1], ValueError), True)
+    npt.assert_equal(isinstance(queries[2], QueryLimitError), True)
+    npt.assert_equal(queries[3] == Query("SELECT name FROM person"), True)
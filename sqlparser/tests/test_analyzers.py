@@ -0,0 +1,51 @@
+import numpy.testing as npt
+
+from sqlparser.analyzers import analyze_query
+from sqlparser.query import Query
+from sqlparser.utils import get_flat_query
+
+
+def test_analyze_query():
+    query = Query("SELECT * FROM ( SELECT a FROM ( SELECT b FROM ( SELECT c FROM t ) ) )"
+                  " WHERE UPPER(name) = 'X' AND height + 1 > 3 AND name LIKE '%x'"
+                  " AND id IN ( SELECT id FROM u ) GROUP BY a, b, c, d, e, f")
+    findings = analyze_query(query)
+    flat_query = get_flat_query(query)
+
+    npt.assert_equal([finding['rule'] for finding in findings],
+                     ['select-star', 'nested-derived-table', 'non-sargable',
+                      'non-sargable', 'leading-wildcard', 'in-subquery',
+                      'wide-group-by'])
+
+    flagged_values = {finding['rule']: flat_query[finding['index']].value
+                      for finding in findings}
+    npt.assert_equal(flagged_values['select-star'], '*')
+    npt.assert_equal(flagged_values['leading-wildcard'], "'%x'")
+    npt.assert_equal(flagged_values['wide-group-by'], 'GROUP BY')
+    npt.assert_equal(flagged_values['in-subquery'], 'SELECT')
+    npt.assert_equal(findings[1]['depth'], 3)
+
+    npt.assert_equal(analyze_query(query, max_derived_table_depth=3,
+                                   max_group_by_columns=6)[1]['rule'], 'non-sargable')
+
+
+def test_analyze_clean_query():
+    query = Query("SELECT id, COUNT(*) FROM ( SELECT id FROM person ) "
+                  "WHERE name LIKE 'x%' AND height > 100 GROUP BY id")
+
+    npt.assert_equal(analyze_query(query), [])
+
+    # Calls without a column argument are constants.
+    query = Query("SELECT id FROM person WHERE created > NOW() AND day = DATE('2020-01-01')"
+                  " AND updated < NOW() - 1")
+    npt.assert_equal(analyze_query(query), [])
+
+
+def test_analyze_deep_nesting():
+    depth = 1500
+    query = Query(("SELECT id FROM ( " * depth) + "SELECT * FROM person" + (" )" * depth))
+    findings = analyze_query(query)
+
+    npt.assert_equal(len(findings), depth - 1)
+    npt.assert_equal(findings[-1]['rule'], 'select-star')
+    npt.assert_equal(findings[-1]['depth'], depth)
@@ -0,0 +1,28 @@
+import numpy.testing as npt
+
+from sqlparser.complexity import complexity
+from sqlparser.query import Query
+
+
+def test_complexity():
+    query = Query("SELECT SUM(height) as total_height, AVG(height) as average_height FROM "
+                  "( SELECT id, height FROM person WHERE id IN ( 1 , 2 , 3 ) "
+                  "GROUP BY id, height ) WHERE height>100 AND weight = 1")
+    query_complexity = complexity(query)
+
+    npt.assert_equal(query_complexity.as_dict(), {
+        'max_depth': 1, 'queries': 2, 'aggregates': 2, 'predicates': 3,
+        'literals': 3, 'max_literal_list': 3, 'tokens': 26})
+
+    npt.assert_almost_equal(query_complexity.score(), 29.63)
+    npt.assert_almost_equal(
+        query_complexity.score({'tokens': 0, 'literals': 0, 'queries': 0}), 17)
+
+
+def test_complexity_deep_nesting():
+    depth = 1500
+    query = Query(("SELECT id FROM ( " * depth) + "SELECT id FROM person" + (" )" * depth))
+    query_complexity = complexity(query)
+
+    npt.assert_equal(query_complexity.max_depth, depth)
+    npt.assert_equal(query_complexity.queries, depth + 1)
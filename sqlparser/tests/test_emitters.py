@@ -0,0 +1,54 @@
+from io import StringIO
+
+import numpy.testing as npt
+
+from sqlparser.emitters import minify, write_query
+from sqlparser.query import Query, create_query_dict
+
+
+def test_minify():
+    sql = """SELECT  SUM(height) as total_height, -- total
+       AVG(height)   as average_height
+    FROM /* derived ; 'x' */ (
+        SELECT id, height FROM person
+        group   by id, height
+    ) WHERE name = 'a--b' AND height>100"""
+    minified_sql = minify(sql)
+
+    npt.assert_equal(minified_sql,
+                     "SELECT SUM(height) as total_height , AVG(height) as average_height FROM "
+                     "( SELECT id , height FROM person GROUP BY id , height ) "
+                     "WHERE name = 'a--b' AND height>100")
+    npt.assert_equal(minify(minified_sql), minified_sql)
+
+    # Minified queries re-parse to the query dict of the original.
+    original_queries = [
+        "SELECT  SUM(height) as total_height ,\n\tAVG(height)   as average_height\n FROM (\n"
+        "  SELECT id , height FROM person\n  GROUP BY id , height\n ) WHERE height>100",
+        "SELECT x FROM t\n WHERE x IN (   SELECT y FROM u   )",
+        "SELECT id FROM person WHERE id IN ( 1 ,  2 , 3 ) AND name = 'bob'",
+    ]
+    for original_sql in original_queries:
+        npt.assert_equal(create_query_dict(Query(minify(original_sql)), compact=True),
+                         create_query_dict(Query(original_sql), compact=True))
+
+    # Separators are spaced, so that the lexer splits them off.
+    npt.assert_equal(minify("SELECT x FROM t WHERE x IN (SELECT y FROM u)"),
+                     "SELECT x FROM t WHERE x IN ( SELECT y FROM u )")
+
+    npt.assert_equal(minify("SELECT a/*x*/FROM t"), "SELECT a FROM t")
+    npt.assert_equal(minify("SELECT 'it''s  --' FROM t"), "SELECT 'it''s  --' FROM t")
+    npt.assert_equal(minify("select max, max(id) from t order by max"),
+                     "SELECT max , MAX(id) FROM t ORDER BY max")
+
+    stream = StringIO()
+    npt.assert_equal(minify("select id  from person", stream), None)
+    npt.assert_equal(stream.getvalue(), "SELECT id FROM person")
+
+
+def test_write_query():
+    sql = "SELECT id FROM ( SELECT id FROM ( SELECT id FROM person ) ) WHERE id IN ( 1 , 2 )"
+    stream = StringIO()
+    write_query(Query(sql), stream)
+
+    npt.assert_equal(stream.getvalue(), sql)
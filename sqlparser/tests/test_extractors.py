@@ -0,0 +1,41 @@
+import numpy.testing as npt
+
+from sqlparser.extractors import (referenced_columns, referenced_tables,
+                                  statement_type)
+from sqlparser.grammar import get_grammar
+
+
+def test_statement_type():
+    npt.assert_equal(statement_type("select id from person"), 'SELECT')
+    npt.assert_equal(statement_type("( SELECT id FROM person )"), 'SELECT')
+    npt.assert_equal(statement_type("INSERT INTO person VALUES (1)"), 'INSERT INTO')
+    npt.assert_equal(statement_type("DELETE FROM person"), 'DELETE')
+    npt.assert_equal(statement_type("person"), None)
+    npt.assert_equal(statement_type("REPLACE INTO person VALUES (1)",
+                                    get_grammar('mysql')), 'REPLACE INTO')
+
+
+def test_referenced_tables():
+    query = ("SELECT SUM(height) as total_height FROM ( SELECT id, height FROM person"
+             " GROUP BY id, height ) WHERE height>100")
+    npt.assert_equal(referenced_tables(query), ['person'])
+
+    query = ("select p.id from person p, owner as o left outer join pet x "
+             "on p.id = x.owner_id where x.name = 'FROM cats'")
+    npt.assert_equal(referenced_tables(query), ['person', 'owner', 'pet'])
+    npt.assert_equal(referenced_tables('INSERT INTO "My Table" (a) VALUES (1)'),
+                     ['My Table'])
+    npt.assert_equal(referenced_tables("UPDATE person SET height = 1"), ['person'])
+
+
+def test_referenced_columns():
+    query = ("SELECT SUM(height) as total_height, AVG(height) average_height FROM "
+             "( SELECT id, height FROM person GROUP BY id, height ) WHERE height>100")
+    npt.assert_equal(referenced_columns(query), ['height', 'id'])
+
+    query = ("select p.name, count(*) from person p join pet as x on p.id=x.owner_id "
+             "where x.kind = 'dog' and p.age is not null order by p.name desc")
+    npt.assert_equal(referenced_columns(query),
+                     ['p.name', 'p.id', 'x.owner_id', 'x.kind', 'p.age'])
+    npt.assert_equal(referenced_columns("SELECT CASE WHEN a > 1 THEN b END total FROM t"),
+                     ['a', 'b'])
@@ -1,6 +1,6 @@
 import numpy.testing as npt
-from sqlparser.filters import (FilterStack, QueryFilter, process_case,
-                               process_separator)
+from sqlparser.filters import (FilterStack, QueryFilter, normalize_query,
+                               process_case, process_separator)
 from sqlparser.query import Query
 
 
@@ -23,6 +23,32 @@ def test_process_separator():
         npt.assert_equal(char in separators, False)
 
 
+def test_literal_safe_processing():
+    query = "select name from person where name = 'select (a)'"
+
+    npt.assert_equal(process_case(query),
+                     "SELECT NAME FROM PERSON WHERE NAME = 'select (a)'")
+    npt.assert_equal(process_separator("SELECT COUNT(id) FROM t WHERE a = '(b)'"),
+                     "SELECT COUNT id  FROM t WHERE a = '(b)'")
+
+
+def test_normalize_query():
+    query = ("select sum(height) as total,\n\tname from (select * from person)"
+             " where name = 'it''s  (a) select' and height>100;")
+
+    npt.assert_equal(normalize_query(query),
+                     "SELECT SUM(height) as total , name FROM ( SELECT * FROM person )"
+                     " WHERE name = 'it''s  (a) select' AND height>100 ;")
+    npt.assert_equal(normalize_query("  group   by  "), "GROUP BY")
+    # Only whole keywords and aggregate calls are reserved words.
+    npt.assert_equal(normalize_query("select max, by from t left join u order by max"),
+                     "SELECT max , by FROM t LEFT JOIN u ORDER BY max")
+
+    normalize_stack = FilterStack(filters=[normalize_query])
+    npt.assert_equal(normalize_stack("select id from person"),
+                     "SELECT id FROM person")
+
+
 def test_filter_stack():
     base_filter_stack = FilterStack(filters=[process_case, process_separator])
     query = base_filter_stack(
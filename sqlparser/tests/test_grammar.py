@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy.testing as npt
+
+from sqlparser.grammar import Grammar, __DEFAULT_GRAMMAR__, get_grammar
+from sqlparser.query import Query, create_query_dict
+from sqlparser.tokens import Identifier, Keyword, Number, Operator, Separator
+from sqlparser.utils import get_token_class
+
+
+def test_grammar():
+    grammar = Grammar()
+
+    for value in ['SELECT', 'GROUP', '<=', '(', '100', "'abc'", 'height>100']:
+        npt.assert_equal(grammar.token_class(value), get_token_class(value))
+
+    npt.assert_equal(grammar.token_class('<='), Operator)
+    npt.assert_equal(grammar.token_class(','), Separator)
+    npt.assert_equal(grammar.token_class('42'), Number)
+    npt.assert_equal(grammar.match('keyword', 'SELECT'), True)
+    npt.assert_equal(grammar.match('keyword', 'LIMIT'), False)
+
+    with npt.assert_raises(ValueError):
+        grammar.token_class('[')
+
+    with npt.assert_raises(AttributeError):
+        grammar.name = 'mutated'
+
+    with npt.assert_raises(TypeError):
+        grammar.token_types['keyword'] = []
+
+    with npt.assert_raises(ValueError):
+        get_grammar('unknown')
+
+
+def test_scan_parts():
+    grammar = Grammar()
+    parts = list(grammar.scan_parts(
+        "select max, by -- c\n from t left outer join u order by max(id)"))
+
+    npt.assert_equal([value for _, value, _, is_reserved in parts if is_reserved],
+                     ['SELECT', 'FROM', 'LEFT', 'OUTER', 'JOIN', 'ORDER', 'BY', 'MAX'])
+    npt.assert_equal([value for _, value, _, _ in parts][1:4], ['max', ',', 'by'])
+    npt.assert_equal([is_spaced for _, _, is_spaced, _ in parts][:4], [False, True, False, True])
+
+    # Parts are scanned lazily with a bounded lookahead.
+    npt.assert_equal(next(grammar.scan_parts("SELECT a " * 1000000))[1], 'SELECT')
+
+
+def test_dialect_grammar():
+    postgres = get_grammar('postgres')
+    sql = "SELECT id FROM person LIMIT 10"
+
+    default_query = Query(sql)
+    postgres_query = Query(sql, grammar=postgres)
+
+    npt.assert_equal(isinstance(default_query.tokens[-2], Identifier), True)
+    npt.assert_equal(isinstance(postgres_query.tokens[-2], Keyword), True)
+    npt.assert_equal(postgres_query.tokens[-2].properties['keyword'], True)
+    npt.assert_equal('LIMIT' in create_query_dict(postgres_query), True)
+    npt.assert_equal(__DEFAULT_GRAMMAR__.match('keyword', 'LIMIT'), False)
+
+    extended = postgres.extend('custom', keyword=['QUALIFY'])
+    npt.assert_equal(extended.match('keyword', 'QUALIFY'), True)
+    npt.assert_equal(postgres.match('keyword', 'QUALIFY'), False)
+
+
+def test_grammar_shared_across_threads():
+    grammar = get_grammar('mysql')
+    sql = "SELECT id FROM ( SELECT id FROM person GROUP BY id ) LIMIT 10"
+
+    def parse(_):
+        return list(create_query_dict(Query(sql, grammar=grammar)))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(parse, range(32)))
+
+    for result in results:
+        npt.assert_equal(result, ['SELECT', 'FROM', 'LIMIT'])
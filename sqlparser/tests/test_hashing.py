@@ -0,0 +1,54 @@
+import numpy.testing as npt
+
+from sqlparser.hashing import SubqueryPool
+from sqlparser.query import Query, create_query_dict
+
+
+def test_structural_hash():
+    query = Query("SELECT id FROM ( SELECT id FROM person WHERE id > 1 )")
+    same_query = Query("SELECT  id FROM ( SELECT id FROM person WHERE id > 1 )")
+    other_literal = Query("SELECT id FROM ( SELECT id FROM person WHERE id > 2 )")
+    other_column = Query("SELECT id FROM ( SELECT name FROM person WHERE id > 1 )")
+
+    npt.assert_equal(query == same_query, True)
+    npt.assert_equal(hash(query), hash(same_query))
+    npt.assert_equal(query == other_literal, False)
+    npt.assert_equal(query.shape_hash, other_literal.shape_hash)
+    npt.assert_equal(query.shape_hash == other_column.shape_hash, False)
+    npt.assert_equal(query.tokens[3] == other_literal.tokens[3], False)
+    npt.assert_equal(query == query.tokens[0], False)
+
+
+def test_subquery_pool():
+    pool = SubqueryPool(ignore_literals=True)
+    query = Query("SELECT a FROM ( SELECT id FROM person ) JOIN ( SELECT id FROM person )",
+                  pool=pool)
+    other_query = Query("SELECT b FROM ( SELECT id FROM person WHERE id > 1 )", pool=pool)
+    literal_query = Query("SELECT b FROM ( SELECT id FROM person WHERE id > 2 )", pool=pool)
+
+    npt.assert_equal(query.tokens[3] is query.tokens[5], True)
+    npt.assert_equal(other_query.tokens[3] is literal_query.tokens[3], False)
+    npt.assert_equal(len(pool), 3)
+
+    most_common = pool.most_common()
+    npt.assert_equal([count for _, count in most_common], [2, 2])
+    npt.assert_equal(most_common[0][0] is query.tokens[3], True)
+
+    query_dict = create_query_dict(query, compact=True)
+    npt.assert_equal(query_dict['FROM'][0] is query_dict['JOIN'][0], True)
+
+
+def test_subquery_pool_eviction():
+    pool = SubqueryPool(max_size=2)
+    queries = [Query(f"SELECT a FROM ( SELECT id FROM t{idx} )", pool=pool) for idx in range(5)]
+
+    npt.assert_equal(len(pool), 2)
+    npt.assert_equal(pool.evictions, 3)
+    npt.assert_equal(len(pool.most_common()), 2)
+
+    # Recently used subqueries are kept, evicted ones are pooled again.
+    last_query = Query("SELECT b FROM ( SELECT id FROM t4 )", pool=pool)
+    npt.assert_equal(last_query.tokens[3] is queries[4].tokens[3], True)
+    first_query = Query("SELECT b FROM ( SELECT id FROM t0 )", pool=pool)
+    npt.assert_equal(first_query.tokens[3] is queries[0].tokens[3], False)
+    npt.assert_equal(pool.most_common(1)[0][1], 2)
@@ -0,0 +1,74 @@
+import numpy.testing as npt
+
+from sqlparser.indexes import WorkloadIndex, get_index_terms, intersect, union
+from sqlparser.query import Query, create_query_dict
+
+__WORKLOAD__ = [
+    "SELECT SUM(height) as total_height, AVG(height) as average_height FROM "
+    "( SELECT id, height FROM person GROUP BY id, height ) WHERE height>100",
+    "SELECT p.name FROM person p INNER JOIN orders o ON o.pid = p.id WHERE p.height > 3",
+    "SELECT AVG(person.height) FROM person",
+    "SELECT COUNT(*) FROM orders WHERE name = 'height'",
+]
+
+
+def test_get_index_terms():
+    terms = get_index_terms(create_query_dict(Query(__WORKLOAD__[1]), compact=True))
+
+    npt.assert_equal(sorted(term for term in terms if term[0] == 'table'),
+                     [('table', 'orders'), ('table', 'person')])
+    npt.assert_equal(sorted(value for kind, value in terms if kind == 'column' and '.' in value),
+                     ['orders.pid', 'person.height', 'person.id', 'person.name'])
+    npt.assert_equal(('keyword', 'INNER JOIN') in terms, True)
+
+    terms = get_index_terms(create_query_dict(Query(__WORKLOAD__[3]), compact=True))
+    npt.assert_equal(('aggregate', 'COUNT(*)') in terms, True)
+    npt.assert_equal(('column', 'height') in terms, False)
+
+
+def test_intersect_union():
+    npt.assert_equal(list(intersect([1, 3, 5, 7], [3, 4, 5], [0, 5, 9])), [5])
+    npt.assert_equal(list(intersect([1, 2], [])), [])
+    npt.assert_equal(list(union([1, 3, 5], [2, 3], [])), [1, 2, 3, 5])
+
+
+def test_workload_index(tmpdir):
+    index = WorkloadIndex()
+    for sql in __WORKLOAD__:
+        index.add(Query(sql))
+
+    npt.assert_equal(len(index), 4)
+    npt.assert_equal(list(index.postings('column', 'person.height')), [0, 1, 2])
+    npt.assert_equal(list(index.all_of(('table', 'person'), ('aggregate', 'avg(height)'))),
+                     [0, 2])
+    npt.assert_equal(list(index.any_of(('table', 'ORDERS'), ('aggregate', 'SUM'))), [0, 1, 3])
+
+    index_path = str(tmpdir.join('workload.idx'))
+    index.save(index_path)
+    loaded_index = WorkloadIndex.load(index_path)
+
+    npt.assert_equal(len(loaded_index), 4)
+    npt.assert_equal(list(loaded_index.postings('column', 'person.height')), [0, 1, 2])
+
+    npt.assert_equal(loaded_index.add(Query("SELECT height FROM person")), 4)
+    npt.assert_equal(loaded_index.add(create_query_dict(Query("SELECT id FROM person"),
+                                                        compact=True), 10), 10)
+    npt.assert_equal(list(loaded_index.all_of(('table', 'person'), ('column', 'height'))),
+                     [0, 1, 2, 4])
+    npt.assert_equal(list(loaded_index.postings('table', 'person')), [0, 1, 2, 4, 10])
+    person_postings = loaded_index.postings('table', 'person')
+    loaded_index.close()
+    npt.assert_equal(list(person_postings), [0, 1, 2, 4, 10])
+
+    loaded_index = WorkloadIndex.load(index_path)
+    npt.assert_equal(list(loaded_index.postings('table', 'person')), [0, 1, 2])
+    loaded_index.close()
+
+    # Adding a query again under its id does not count it twice.
+    npt.assert_equal(index.add(Query("SELECT id FROM orders"), 1), 1)
+    npt.assert_equal(len(index), 4)
+    npt.assert_equal(list(index.postings('table', 'orders')), [1, 3])
+    loaded_index = WorkloadIndex.load(index_path)
+    loaded_index.add(Query("SELECT id FROM person"), 0)
+    npt.assert_equal(len(loaded_index), 4)
+    loaded_index.close()
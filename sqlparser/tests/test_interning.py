@@ -0,0 +1,50 @@
+from operator import setitem
+
+import numpy.testing as npt
+
+from sqlparser.interning import TokenPool
+from sqlparser.query import Query, create_query_dict
+
+
+def test_token_pool():
+    token_pool = TokenPool()
+    sql = ("SELECT SUM(height) as total_height, AVG(height) as average_height FROM "
+           "( SELECT id, height FROM person GROUP BY id, height ) WHERE height>100")
+    first_query = Query(sql, token_pool=token_pool)
+    misses = token_pool.misses
+    second_query = Query(sql, token_pool=token_pool)
+
+    npt.assert_equal(first_query.tokens[0] is second_query.tokens[0], True)
+    npt.assert_equal(first_query.tokens[8].tokens[1] is second_query.tokens[8].tokens[1], True)
+    npt.assert_equal(create_query_dict(second_query), create_query_dict(first_query))
+    npt.assert_equal(create_query_dict(second_query, compact=True),
+                     create_query_dict(Query(sql), compact=True))
+    npt.assert_equal(token_pool.misses, misses)
+    npt.assert_equal(token_pool.hit_rate, token_pool.hits / (token_pool.hits + misses))
+    pooled_token = first_query.tokens[0]
+    for name, value in (('value', 'FROM'), ('validate', False), ('grammar', None),
+                        ('token_dict', {}), ('_properties', {}), ('_frozen', False)):
+        npt.assert_raises(AttributeError, setattr, pooled_token, name, value)
+    npt.assert_raises(AttributeError, delattr, pooled_token, '_value')
+    npt.assert_raises(TypeError, setitem, pooled_token.properties, 'keyword', False)
+    npt.assert_raises(TypeError, setitem, pooled_token.token_dict, 'keyword', ())
+    npt.assert_equal(isinstance(pooled_token.token_dict['keyword'], tuple), True)
+    npt.assert_equal((pooled_token.value, pooled_token.properties['keyword']), ('SELECT', True))
+
+    literal_queries = [Query("SELECT id FROM person WHERE id = 5", token_pool=token_pool)
+                       for _ in range(2)]
+    npt.assert_equal(literal_queries[0].tokens[3] is literal_queries[1].tokens[3], True)
+    npt.assert_equal(literal_queries[0].tokens[-1] is literal_queries[1].tokens[-1], False)
+
+
+def test_token_pool_eviction():
+    token_pool = TokenPool(max_size=4)
+    for sql in ("SELECT a FROM b", "SELECT c FROM d", "SELECT a FROM b"):
+        Query(sql, token_pool=token_pool)
+
+    npt.assert_equal(len(token_pool), 4)
+    npt.assert_equal(token_pool.stats(), {'size': 4, 'hits': 4, 'misses': 8,
+                                          'evictions': 4, 'hit_rate': 1 / 3})
+
+    token_pool.clear()
+    npt.assert_equal((len(token_pool), token_pool.hit_rate), (0, 0.0))
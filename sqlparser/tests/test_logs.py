@@ -0,0 +1,102 @@
+import gzip
+
+import numpy.testing as npt
+
+from sqlparser.exceptions import QueryLimitError
+from sqlparser.logs import (_StatementBuffer, latency_by_shape, read_mysql_slow_log,
+                            read_postgres_log)
+
+__POSTGRES_LOG__ = (
+    "2024-01-01 12:00:00.123 UTC [1234] alice@shop LOG:  duration: 12.500 ms"
+    "  statement: SELECT id FROM person\n"
+    "\tWHERE height > 100;\n"
+    "2024-01-01 12:00:01.000 UTC [1234] alice@shop LOG:  connection authorized: user=alice\n"
+    "2024-01-01 12:00:02.000 UTC [1235] bob@shop LOG:  duration: 7.500 ms"
+    "  execute S_1: select id from person where height > 200\n"
+    "2024-01-01 12:00:03.000 UTC [1235] bob@shop LOG:  duration: 1.000 ms"
+    "  execute S_2: select id from person where id = $1\n"
+    "2024-01-01 12:00:04.000 UTC [1236] bob@shop LOG:  duration: 30.000 ms"
+    "  statement: select avg(height) from person\n"
+)
+
+__MYSQL_LOG__ = """\
+/usr/sbin/mysqld, Version: 8.0.35 (MySQL Community Server - GPL). started with:
+Tcp port: 3306  Unix socket: /tmp/mysql.sock
+Time                 Id Command    Argument
+# Time: 2024-01-01T12:00:00.123456Z
+# User@Host: root[root] @ localhost []  Id:     8
+# Query_time: 0.250000  Lock_time: 0.000093 Rows_sent: 1  Rows_examined: 2
+use shop;
+SET timestamp=1704110400;
+SELECT id, name
+FROM person WHERE id IN ( 1 , 2 );
+# Time: 2024-01-01T12:00:01.000000Z
+# User@Host: root[root] @ localhost []  Id:     8
+# Query_time: 1.500000  Lock_time: 0.000000 Rows_sent: 1  Rows_examined: 2
+SET timestamp=1704110401;
+SELECT id, name FROM person WHERE id IN ( 3 , 4 );
+"""
+
+
+def test_read_postgres_log():
+    records = list(read_postgres_log(__POSTGRES_LOG__.splitlines(keepends=True)))
+
+    npt.assert_equal([record.duration for record in records], [12.5, 7.5, 1.0, 30.0])
+    npt.assert_equal([record.user for record in records], ['alice', 'bob', 'bob', 'bob'])
+    npt.assert_equal(records[0].database, 'shop')
+    npt.assert_equal(records[0].timestamp, '2024-01-01 12:00:00.123 UTC')
+    npt.assert_equal(records[0].sql, "SELECT id FROM person\n\tWHERE height > 100;")
+    npt.assert_equal(records[1].query_dict, {'SELECT': ('id',), 'FROM': ('person',),
+                                             'WHERE': ('height', '>', '200')})
+
+    npt.assert_equal((records[2].query, isinstance(records[2].error, ValueError)), (None, True))
+    npt.assert_equal(records[3].query_dict, {'SELECT': ({'AVG': 'height'},), 'FROM': ('person',)})
+
+    latencies = latency_by_shape(records[:3])
+    npt.assert_equal(list(latencies.values()), [{
+        'count': 2,
+        'total_duration': 20.0,
+        'max_duration': 12.5,
+        'sql': "SELECT id FROM person\n\tWHERE height > 100;",
+    }])
+
+
+def test_read_mysql_slow_log(tmpdir):
+    log_path = str(tmpdir.join('slow.log.gz'))
+    with gzip.open(log_path, 'wt') as log_file:
+        log_file.write(__MYSQL_LOG__)
+
+    records = list(read_mysql_slow_log(log_path))
+
+    npt.assert_equal([record.duration for record in records], [250.0, 1500.0])
+    npt.assert_equal([record.database for record in records], ['shop', 'shop'])
+    npt.assert_equal(records[0].user, 'root')
+    npt.assert_equal(records[1].timestamp, '2024-01-01T12:00:01.000000Z')
+    npt.assert_equal(records[1].sql, "SELECT id, name FROM person WHERE id IN ( 3 , 4 );")
+    npt.assert_equal(records[0].query.shape_hash, records[1].query.shape_hash)
+
+    records = list(read_mysql_slow_log(__MYSQL_LOG__.splitlines(keepends=True),
+                                       max_statement_bytes=16))
+    npt.assert_equal([record.sql for record in records], [None, None])
+    npt.assert_equal(isinstance(records[0].error, QueryLimitError), True)
+
+
+def test_statement_bytes_limit():
+    log_lines = ["2024-01-01 12:00:00 UTC [1] alice@shop LOG:  duration: 1.000 ms"
+                 "  statement: SELECT id FROM person\n",
+                 "\tWHERE name = 'éé';\n"]
+
+    # The statement is 42 characters but 44 bytes long in UTF-8.
+    records = list(read_postgres_log(log_lines, parse=False, max_statement_bytes=43))
+    npt.assert_equal(records[0].sql, None)
+
+    records = list(read_postgres_log(log_lines, parse=False, max_statement_bytes=44))
+    npt.assert_equal(records[0].sql, "SELECT id FROM person\n\tWHERE name = 'éé';")
+
+    buffer = _StatementBuffer(8)
+    buffer.append("abcd")
+    buffer.append("éé")
+    npt.assert_equal((buffer.lines, buffer.size), (["abcd", "éé"], 8))
+    buffer.append("x")
+    npt.assert_equal((buffer.lines, buffer.is_oversized), ([], True))
+    npt.assert_equal((buffer.pop(), buffer.pop()), (None, ""))
@@ -0,0 +1,154 @@
+import json
+from time import sleep
+
+import numpy.testing as npt
+
+from sqlparser.counters import ParseCounters
+from sqlparser.exceptions import QueryLimitError, QueryParseError
+from sqlparser.limits import ParseLimits
+from sqlparser.query import Query, create_query_dict, create_query_string
+from sqlparser.tokens import Identifier, Keyword, LiteralList, Number, String
+from sqlparser.utils import build_keyword_trie, match_keyword
+
+
+def test_keyword_trie():
+    keyword_trie = build_keyword_trie(['LEFT JOIN', 'LEFT OUTER JOIN', 'JOIN'])
+    words = ['LEFT', 'OUTER', 'JOIN', 'person']
+
+    npt.assert_equal(match_keyword(keyword_trie, words, 0),
+                     ('LEFT OUTER JOIN', 3))
+    npt.assert_equal(match_keyword(keyword_trie, words, 2), ('JOIN', 3))
+    npt.assert_equal(match_keyword(keyword_trie, words, 3), (None, 3))
+    npt.assert_equal(match_keyword(keyword_trie, ['LEFT', 'OUTER'], 0),
+                     (None, 0))
+
+
+def test_multi_word_keywords():
+    query = Query("SELECT id FROM person LEFT OUTER JOIN pet "
+                  "GROUP BY id ORDER  BY id")
+    keywords = [token.value for token in query.tokens
+                if isinstance(token, Keyword)]
+
+    npt.assert_equal(keywords, ['SELECT', 'FROM', 'LEFT OUTER JOIN',
+                                'GROUP BY', 'ORDER BY'])
+
+    query = Query("SELECT GROUP FROM person")
+    npt.assert_equal(isinstance(query.tokens[1], Identifier), True)
+    npt.assert_equal(query.tokens[1].value, 'GROUP')
+
+    subquery = Query("SELECT id FROM ( SELECT id FROM person GROUP BY id )")
+    npt.assert_equal(subquery.tokens[-1].tokens[-2].value, 'GROUP BY')
+
+
+def test_parse_limits():
+    sql = "SELECT id FROM ( SELECT id FROM ( SELECT id FROM person ) )"
+
+    query = Query(sql, limits=ParseLimits(max_bytes=len(sql), max_tokens=16,
+                                          max_depth=2, timeout=10))
+    npt.assert_equal(isinstance(create_query_dict(query), dict), True)
+
+    limit_cases = [(ParseLimits(max_bytes=10), 'max_bytes'),
+                   (ParseLimits(max_tokens=5), 'max_tokens'),
+                   (ParseLimits(max_depth=1), 'max_depth'),
+                   (ParseLimits(timeout=-1), 'timeout')]
+
+    for limits, limit_name in limit_cases:
+        with npt.assert_raises(QueryParseError):
+            Query(sql, limits=limits)
+
+        try:
+            Query(sql, limits=limits)
+        except QueryLimitError as err:
+            npt.assert_equal(err.limit, limit_name)
+
+    # The deadline only applies while parsing.
+    query = Query(sql, limits=ParseLimits(timeout=0.05))
+    sleep(0.1)
+    npt.assert_equal(create_query_dict(query, compact=True)['SELECT'], ('id',))
+
+
+def test_compact_query_dict():
+    sql = ("SELECT SUM(height) as total_height, id FROM "
+           "( SELECT id, height FROM person GROUP BY id, height ) WHERE height>100")
+    query_dict = create_query_dict(Query(sql))
+    compact_dict = create_query_dict(Query(sql), compact=True)
+
+    npt.assert_equal(compact_dict, {
+        'SELECT': ({'SUM': 'height'}, 'id'),
+        'FROM': ({'SELECT': ('id,', 'height'), 'FROM': ('person',),
+                  'GROUP BY': ('id,', 'height')},),
+        'WHERE': ('height>100',),
+    })
+    npt.assert_equal(list(compact_dict), list(query_dict))
+    npt.assert_equal(json.loads(json.dumps(compact_dict))['WHERE'],
+                     ['height>100'])
+
+
+def test_create_query_string():
+    sql = ("SELECT SUM(height) as total_height FROM ( SELECT id, height FROM person"
+           " GROUP BY id, height ) WHERE height>100")
+    query = Query(sql)
+
+    npt.assert_equal(create_query_string(query), sql)
+    npt.assert_equal(Query(create_query_string(query)) == query, True)
+
+    # Building the query dict leaves the query, and thus its hash, untouched.
+    structural_hash = query.structural_hash
+    create_query_dict(query)
+    create_query_dict(query, compact=True)
+    npt.assert_equal(create_query_string(query), sql)
+    npt.assert_equal(query.structural_hash, structural_hash)
+    npt.assert_equal(Query(sql) == query, True)
+    npt.assert_equal(len({query, Query(sql)}), 1)
+
+
+def test_parse_counters():
+    sql = ("SELECT SUM(height) as total_height FROM ( SELECT id, height FROM person"
+           " GROUP BY id, height ) WHERE height>100")
+    counters = ParseCounters()
+    query = Query(sql, counters=counters)
+
+    npt.assert_equal(query.counters is counters, True)
+    npt.assert_equal(counters.queries, 2)
+    npt.assert_equal(counters.tokens, 17)
+    npt.assert_equal(counters.removals, 2)
+    npt.assert_equal(counters.list_copies, 3)
+    npt.assert_equal(counters.regex_evaluations > counters.tokens // 2, True)
+
+    create_query_dict(query)
+    npt.assert_equal(counters.removals, 4)
+
+    batch_counters = sum([counters, ParseCounters(tokens=4, queries=1)])
+    npt.assert_equal(batch_counters.tokens, 21)
+    npt.assert_equal(batch_counters.queries, 3)
+    npt.assert_equal(Query(sql).counters, None)
+
+    # Identifiers are classified and validated with a regex each, keywords
+    # are matched without one.
+    counters = ParseCounters()
+    Query("SELECT id FROM person", counters=counters)
+    npt.assert_equal(counters.regex_evaluations, 4)
+
+
+def test_literal_lists():
+    sql = ("SELECT id FROM person WHERE id IN ( 1 , 2 , 3 ) AND name IN ( 'a', 'b' )"
+           " AND age IN ( 5 ) AND height IN ( 1 , 'a' )")
+    query = Query(sql)
+    literal_lists = [token for token in query.tokens if isinstance(token, LiteralList)]
+
+    npt.assert_equal([(len(literal_list), literal_list.literal_class)
+                      for literal_list in literal_lists], [(3, Number), (2, String)])
+    npt.assert_equal(Query(create_query_string(query)) == query, True)
+
+    query_dict = create_query_dict(Query(sql), compact=True)
+    npt.assert_equal(query_dict['IN'][:2], (('1', '2', '3'), ("'a'", "'b'")))
+
+    large_query = Query("SELECT id FROM person WHERE id IN ( " +
+                        " , ".join(str(idx) for idx in range(10000)) + " )")
+    npt.assert_equal(len(large_query.tokens), 8)
+    npt.assert_equal(len(large_query.tokens[-1]), 10000)
+    npt.assert_equal(large_query == Query(create_query_string(large_query)), True)
+
+    # Every literal of a list counts towards the token limit.
+    with npt.assert_raises(QueryLimitError):
+        Query(create_query_string(large_query), limits=ParseLimits(max_tokens=20))
@@ -0,0 +1,99 @@
+import numpy.testing as npt
+
+from sqlparser.query import Query, create_query_dict, create_query_string
+from sqlparser.grammar import get_grammar
+from sqlparser.rewriters import flatten_subqueries, parameterize
+
+
+def rewrite(sql):
+    return create_query_string(flatten_subqueries(Query(sql)))
+
+
+def test_merge_derived_table():
+    npt.assert_equal(
+        rewrite("SELECT id FROM ( SELECT id, height FROM person WHERE height > 3 OR id = 1 )"
+                " WHERE id > 5 AND height < 10"),
+        "SELECT id FROM person WHERE ( height > 3 OR id = 1 ) AND id > 5 AND height < 10")
+    npt.assert_equal(rewrite("SELECT * FROM ( SELECT * FROM ( SELECT id FROM person ) )"),
+                     "SELECT id FROM person")
+
+    unsafe_queries = ["SELECT name FROM ( SELECT id, height FROM person )",
+                      "SELECT id FROM ( SELECT id FROM person LIMIT 5 ) WHERE id > 1",
+                      "SELECT id FROM ( SELECT COUNT(id) as id FROM person )",
+                      "SELECT b FROM ( SELECT a b FROM t )",
+                      "SELECT id FROM ( SELECT a b FROM t ) WHERE b > 1"]
+    for sql in unsafe_queries:
+        npt.assert_equal(rewrite(sql), sql)
+
+
+def test_push_down_predicates():
+    sql = ("SELECT SUM(height) as total_height, AVG(height) as average_height FROM "
+           "( SELECT id, height FROM person GROUP BY id, height ) WHERE height>100")
+    rewritten_sql = rewrite(sql)
+
+    npt.assert_equal(rewritten_sql,
+                     "SELECT SUM(height) as total_height, AVG(height) as average_height FROM "
+                     "( SELECT id, height FROM person WHERE height>100 GROUP BY id, height )")
+    npt.assert_equal(list(create_query_dict(Query(rewritten_sql))), ['SELECT', 'FROM'])
+
+    npt.assert_equal(
+        rewrite("SELECT id FROM ( SELECT id, COUNT(x) as c FROM person GROUP BY id )"
+                " WHERE c > 1 AND id BETWEEN 1 AND 5"),
+        "SELECT id FROM ( SELECT id, COUNT(x) as c FROM person WHERE id BETWEEN 1 AND 5"
+        " GROUP BY id ) WHERE c > 1")
+
+    # Outside the derived table `a` is the alias of `b`, inside it `t.a`.
+    unsafe_queries = ["SELECT a FROM ( SELECT b as a, c FROM t GROUP BY a, c ) WHERE a > 1",
+                      "SELECT a FROM ( SELECT b a FROM t GROUP BY a ) WHERE a > 1"]
+    for sql in unsafe_queries:
+        npt.assert_equal(rewrite(sql), sql)
+
+
+def test_flatten_does_not_modify_query():
+    sql = "SELECT id FROM ( SELECT id FROM person ) WHERE id > 1"
+    query = Query(sql)
+    flatten_subqueries(query)
+
+    npt.assert_equal(create_query_string(query), sql)
+
+
+def test_flatten_deep_nesting():
+    depth = 1500
+    sql = ("SELECT id FROM ( " * depth) + "SELECT id FROM person" + (" )" * depth)
+
+    npt.assert_equal(rewrite(sql), "SELECT id FROM person")
+
+
+def test_parameterize():
+    query = Query("SELECT id FROM ( SELECT id FROM person WHERE name = 'bob' ) "
+                  "WHERE id IN ( 1 , 2 , 3 ) AND id % 2 = 1")
+    parameterized_query = parameterize(query)
+
+    npt.assert_equal(parameterized_query.template,
+                     "SELECT id FROM ( SELECT id FROM person WHERE name = ? ) "
+                     "WHERE id IN ( ? , ? , ? ) AND id % ? = ?")
+    npt.assert_equal(parameterized_query.parameters, ('bob', 1, 2, 3, 2, 1))
+    npt.assert_equal(parameterize(query, 'dollar').template,
+                     "SELECT id FROM ( SELECT id FROM person WHERE name = $1 ) "
+                     "WHERE id IN ( $2 , $3 , $4 ) AND id % $5 = $6")
+    npt.assert_equal(parameterize(query, 'format').template,
+                     "SELECT id FROM ( SELECT id FROM person WHERE name = %s ) "
+                     "WHERE id IN ( %s , %s , %s ) AND id %% %s = %s")
+
+    other_query = Query("SELECT id FROM ( SELECT id FROM person WHERE name = 'alice' ) "
+                        "WHERE id IN ( 7 , 8 , 9 ) AND id % 3 = 0")
+    npt.assert_equal(parameterize(other_query) == parameterized_query, True)
+    npt.assert_equal(len({parameterize(other_query), parameterized_query}), 1)
+
+    attached_query = parameterize(Query("SELECT id FROM person WHERE height>100 AND name='bob'"))
+    npt.assert_equal(attached_query.template, "SELECT id FROM person WHERE height>? AND name=?")
+    npt.assert_equal(attached_query.parameters, (100, 'bob'))
+    npt.assert_equal(parameterize(Query("SELECT id FROM person WHERE height>200 AND name='al'")),
+                     attached_query)
+    npt.assert_equal(parameterize(Query("SELECT id FROM t WHERE c0%2=1"), 'format').template,
+                     "SELECT id FROM t WHERE c0%%%s=%s")
+
+    postgres_query = Query("SELECT id FROM person WHERE id = 5", grammar=get_grammar('postgres'))
+    npt.assert_equal(parameterize(postgres_query).template,
+                     "SELECT id FROM person WHERE id = $1")
+    npt.assert_raises(ValueError, parameterize, query, 'named')
@@ -0,0 +1,178 @@
+"""Scaling stress tests, every stage must stay within its declared complexity.
+
+Each stage is run on generated queries of doubling sizes, the growth
+exponents of its executed Python lines, CPU time and peak memory are fitted
+on a log-log scale and compared against the declared bounds. Line counts and
+memory are deterministic, CPU time also catches work done in C, e.g. a
+`list.index` per token, and is measured again before a violation is reported.
+"""
+import gc
+import sys
+import tracemalloc
+from math import log
+from time import process_time
+
+import numpy.testing as npt
+
+from sqlparser.filters import normalize_query
+from sqlparser.query import Query, create_query_dict
+
+# Tolerance on top of the declared exponent, absorbs measurement noise.
+__EXPONENT_TOLERANCE__ = 0.35
+__REPEATS__ = 3
+# Number of times a time exponent is measured before it counts as a violation.
+__TIME_ATTEMPTS__ = 3
+
+
+def columns_query(size):
+    """SELECT list with `size` columns."""
+    columns = ", ".join(f"c{idx}" for idx in range(size))
+    return f"SELECT {columns} FROM person WHERE c0 > 1"
+
+
+def in_list_query(size):
+    """IN list with `size` literals."""
+    values = " , ".join(str(idx) for idx in range(size))
+    return f"SELECT id FROM person WHERE id IN ( {values} )"
+
+
+def alias_query(size):
+    """SELECT list with `size` aliased aggregates."""
+    columns = ", ".join(f"SUM(c{idx}) as total_{idx}" for idx in range(size))
+    return f"SELECT {columns} FROM person"
+
+
+def nested_query(size):
+    """Subqueries nested `size` levels deep."""
+    return ("SELECT id FROM ( " * size) + "SELECT id FROM person" + (" )" * size)
+
+
+def parse(sql):
+    return lambda: Query(sql)
+
+
+def query_dict(sql):
+    query = Query(sql)
+    return lambda: create_query_dict(query)
+
+
+def normalize(sql):
+    return lambda: normalize_query(sql)
+
+
+# (stage, query generator, sizes, declared time exponent, declared memory exponent)
+__COMPLEXITY_BOUNDS__ = [
+    (parse, columns_query, [250, 500, 1000, 2000], 1, 1),
+    (parse, in_list_query, [250, 500, 1000, 2000], 1, 1),
+    (parse, nested_query, [128, 256, 512, 1024], 1, 1),
+    (query_dict, columns_query, [500, 1000, 2000, 4000], 1, 1),
+    (query_dict, in_list_query, [250, 500, 1000, 2000], 1, 1),
+    (query_dict, alias_query, [500, 1000, 2000, 4000], 1, 1),
+    (query_dict, nested_query, [64, 128, 256, 512], 1, 1),
+    (normalize, columns_query, [500, 1000, 2000, 4000], 1, 1),
+    (normalize, alias_query, [500, 1000, 2000, 4000], 1, 1),
+]
+
+
+def fit_exponent(sizes, costs):
+    """Fit `cost = a * size ** exponent` with least squares on a log-log scale."""
+    log_sizes = [log(size) for size in sizes]
+    log_costs = [log(max(cost, 1e-9)) for cost in costs]
+    mean_size = sum(log_sizes) / len(log_sizes)
+    mean_cost = sum(log_costs) / len(log_costs)
+
+    covariance = sum((log_size - mean_size) * (log_cost - mean_cost)
+                     for log_size, log_cost in zip(log_sizes, log_costs))
+    variance = sum((log_size - mean_size) ** 2 for log_size in log_sizes)
+
+    return covariance / variance
+
+
+def measure_time(stage, sql):
+    """Best of `__REPEATS__` CPU times of a stage, other processes do not add to it."""
+    timings = []
+
+    for _ in range(__REPEATS__):
+        run_stage = stage(sql)
+        gc.collect()
+        start_time = process_time()
+        run_stage()
+        timings.append(process_time() - start_time)
+
+    return min(timings)
+
+
+def count_operations(stage, sql):
+    """Number of Python lines executed while running a stage."""
+    run_stage = stage(sql)
+    line_count = 0
+
+    def trace(frame, event, arg):
+        nonlocal line_count
+        if event == 'line':
+            line_count += 1
+        return trace
+
+    sys.settrace(trace)
+    try:
+        run_stage()
+    finally:
+        sys.settrace(None)
+
+    return line_count
+
+
+def measure_memory(stage, sql):
+    """Peak memory allocated while running a stage."""
+    run_stage = stage(sql)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run_stage()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_complexity_bounds():
+    violations = []
+
+    for stage, generator, sizes, time_bound, memory_bound in __COMPLEXITY_BOUNDS__:
+        queries = [generator(size) for size in sizes]
+        costs = [
+            ('memory', lambda: [measure_memory(stage, sql) for sql in queries], memory_bound, 1),
+            ('operations', lambda: [count_operations(stage, sql) for sql in queries],
+             time_bound, 1),
+            ('time', lambda: [measure_time(stage, sql) for sql in queries],
+             time_bound, __TIME_ATTEMPTS__),
+        ]
+
+        for kind, measure_costs, bound, attempts in costs:
+            # A noisy measurement only counts if it does not go away.
+            for _ in range(attempts):
+                exponent = fit_exponent(sizes, measure_costs())
+                if exponent <= bound + __EXPONENT_TOLERANCE__:
+                    break
+            else:
+                violations.append(f"{stage.__name__}/{generator.__name__} {kind} grows "
+                                  f"as n^{exponent:.2f}, declared n^{bound}")
+
+    assert not violations, violations
+
+
+def test_fit_exponent():
+    sizes = [100, 200, 400, 800]
+
+    npt.assert_almost_equal(fit_exponent(sizes, [size for size in sizes]), 1)
+    npt.assert_almost_equal(fit_exponent(sizes, [size ** 2 for size in sizes]), 2)
+
+
+def test_deep_nesting():
+    query = Query(nested_query(2048))
+
+    for _ in range(2048):
+        query = query.tokens[-1]
+
+    npt.assert_equal(query.depth, 2048)
+    npt.assert_equal([token.value for token in query.tokens],
+                     ['SELECT', 'id', 'FROM', 'person'])
@@ -1,6 +1,6 @@
 import numpy.testing as npt
 
-from sqlparser.tokens import Token
+from sqlparser.tokens import LiteralList, Number, String, Token
 
 
 def test_token(capsys):
@@ -46,3 +46,25 @@ def test_token(capsys):
 
     with npt.assert_raises(ValueError):
         valid_token.value = "["
+
+
+def test_literal_list():
+    numbers = LiteralList(['1', '2', '30'], Number)
+
+    npt.assert_equal(len(numbers), 3)
+    npt.assert_equal(list(numbers), ['1', '2', '30'])
+    npt.assert_equal(numbers[-1], '30')
+    npt.assert_equal(numbers.value, '( 1 , 2 , 30 )')
+    npt.assert_equal(numbers.properties['number'], True)
+    npt.assert_equal(str(numbers), 'LiteralList(Number, 3)')
+
+    strings = LiteralList(["'a'", "'bc'", "'d'"], String)
+    npt.assert_equal(list(strings), ["'a'", "'bc'", "'d'"])
+    npt.assert_equal([strings[0], strings[1], strings[-1]], ["'a'", "'bc'", "'d'"])
+    npt.assert_equal(strings.value, "( 'a' , 'bc' , 'd' )")
+
+    padded_numbers = LiteralList(['007', '99999999999999999999'], Number)
+    npt.assert_equal(list(padded_numbers), ['007', '99999999999999999999'])
+
+    with npt.assert_raises(AttributeError):
+        numbers.value = '( 1 )'
@@ -1,13 +1,19 @@
 """Module to represent SQL tokens as classes"""
 import abc
+from array import array
+from itertools import accumulate, chain
 from re import compile as regex_compile
 from re import error
 from re import match as regex_match
+from types import MappingProxyType
 
 __TOKEN_TYPES__ = {
     'keyword': ['SELECT', 'FROM', 'WHERE', 'AND', 'OR',
-                'NOT', 'LIKE', 'IN', 'GROUP BY', 'INSERT',
-                'UPDATE', 'DELETE'],
+                'NOT', 'LIKE', 'IN', 'GROUP BY', 'ORDER BY', 'INSERT',
+                'INSERT INTO', 'UPDATE', 'DELETE', 'JOIN', 'INNER JOIN',
+                'LEFT JOIN', 'LEFT OUTER JOIN', 'RIGHT JOIN',
+                'RIGHT OUTER JOIN', 'FULL JOIN', 'FULL OUTER JOIN',
+                'CROSS JOIN', 'UNION', 'UNION ALL'],
     'operator': ['=', '<', '>', '<=', '>=', '!=', '+', '-', '*', '/', '%'],
     'separator': ['(', ')', ',', ';'],
     'whitespace': ['[ \t\n\r]+'],
@@ -18,10 +24,19 @@ __TOKEN_TYPES__ = {
 }
 
 
+def _get_token_types(grammar=None):
+    """Get the token types of a grammar, `__TOKEN_TYPES__` if there is none."""
+    return __TOKEN_TYPES__ if grammar is None else grammar.token_types
+
+
 class Token(abc.ABC):
     """Umbrella class for all token classes"""
 
-    def __init__(self, value, validate=True, valid_token_dict=None):
+    # Tokens shared through a `interning.TokenPool` are frozen.
+    _frozen = False
+
+    def __init__(self, value, validate=True, valid_token_dict=None, grammar=None,
+                 counters=None):
         """Initialize the class.
 
         Parameters
@@ -32,28 +47,42 @@ class Token(abc.ABC):
             Whether to validate the value against token types
         valid_token_dict: dict
             A dictionary of valid token types and their values
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate the value
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
         """
-        self._value = str()
         self._properties = dict()
 
         self.validate = validate
-        self.token_dict = valid_token_dict or __TOKEN_TYPES__
+        self.grammar = grammar
+        self.token_dict = valid_token_dict or _get_token_types(grammar)
 
-        self.value = value
+        # The value is validated once here rather than by the setter.
+        self._value = value
 
         if self.value is None:
             raise ValueError("Value cannot be None")
 
         if self.validate:
-            self._validate_value()
+            self._validate_value(counters)
+
+    def _validate_value(self, counters=None):
+        """Validate a value against token types.
 
-    def _validate_value(self):
-        """Validate a value against token types."""
+        Parameters
+        ----------
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
+        """
         for token_item in self.token_dict.items():
             token_type = token_item[0]
             token_values = token_item[1]
 
-            if len(token_values) == 1:
+            if self.grammar is not None:
+                self._properties[token_type] = self.grammar.match(
+                    token_type, self.value, counters)
+            elif len(token_values) == 1:
                 try:
                     regex_compile(token_values[0])
                     is_valid_pattern = True
@@ -61,6 +90,8 @@ class Token(abc.ABC):
                     is_valid_pattern = False
 
                 if is_valid_pattern:
+                    if counters is not None:
+                        counters.regex_evaluations += 1
                     if regex_match(token_values[0], self.value):
                         self._properties[token_type] = True
                     else:
@@ -78,6 +109,28 @@ class Token(abc.ABC):
                                                       self._properties.values()) > 1:
                 self._properties['identifier'] = False
 
+    def __setattr__(self, name, value):
+        """Set an attribute, disallowed once the token is frozen"""
+        if self._frozen:
+            raise AttributeError(f"Attribute {name} of a pooled token cannot be set")
+
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        """Delete an attribute, disallowed once the token is frozen"""
+        if self._frozen:
+            raise AttributeError(f"Attribute {name} of a pooled token cannot be deleted")
+
+        super().__delattr__(name)
+
+    def _freeze(self):
+        """Make the token and its properties read-only so that it can be shared."""
+        self._properties = MappingProxyType(dict(self._properties))
+        self.token_dict = MappingProxyType({token_type: tuple(token_values)
+                                            for token_type, token_values
+                                            in self.token_dict.items()})
+        self._frozen = True
+
     @abc.abstractmethod
     def __str__(self):
         """Return the string representation of the token"""
@@ -105,7 +158,7 @@ class Token(abc.ABC):
 class Keyword(Token):
     """Class to represent SQL keywords"""
 
-    def __init__(self, value, validate=True):
+    def __init__(self, value, validate=True, grammar=None, counters=None):
         """Initialize the class.
 
         Parameters
@@ -114,9 +167,13 @@ class Keyword(Token):
             The value of token
         validate: bool
             Whether to validate the value against token types
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate the value
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
         """
         super().__init__(value, validate, {
-            'keyword': __TOKEN_TYPES__['keyword']})
+            'keyword': _get_token_types(grammar)['keyword']}, grammar, counters)
 
     def __str__(self):
         """Return the string representation of the token"""
@@ -126,7 +183,7 @@ class Keyword(Token):
 class Operator(Token):
     """Class to represent SQL operators"""
 
-    def __init__(self, value, validate=True):
+    def __init__(self, value, validate=True, grammar=None, counters=None):
         """Initialize the class.
 
         Parameters
@@ -135,9 +192,13 @@ class Operator(Token):
             The value of token
         validate: bool
             Whether to validate the value against token types
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate the value
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
         """
         super().__init__(value, validate, {
-            'operator': __TOKEN_TYPES__['operator']})
+            'operator': _get_token_types(grammar)['operator']}, grammar, counters)
 
     def __str__(self):
         """Return the string representation of the token"""
@@ -147,7 +208,7 @@ class Operator(Token):
 class Separator(Token):
     """Class to represent SQL separators"""
 
-    def __init__(self, value, validate=True):
+    def __init__(self, value, validate=True, grammar=None, counters=None):
         """Initialize the class.
 
         Parameters
@@ -156,9 +217,13 @@ class Separator(Token):
             The value of token
         validate: bool
             Whether to validate the value against token types
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate the value
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
         """
         super().__init__(value, validate, {
-            'separator': __TOKEN_TYPES__['separator']})
+            'separator': _get_token_types(grammar)['separator']}, grammar, counters)
 
     def __str__(self):
         """Return the string representation of the token"""
@@ -168,7 +233,7 @@ class Separator(Token):
 class Identifier(Token):
     """Class to represent SQL identifiers"""
 
-    def __init__(self, value, validate=True):
+    def __init__(self, value, validate=True, grammar=None, counters=None):
         """Initialize the class.
 
         Parameters
@@ -177,9 +242,13 @@ class Identifier(Token):
             The value of token
         validate: bool
             Whether to validate the value against token types
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate the value
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
         """
         super().__init__(value, validate, {
-            'identifier': __TOKEN_TYPES__['identifier']})
+            'identifier': _get_token_types(grammar)['identifier']}, grammar, counters)
 
     def __str__(self):
         """Return the string representation of the token"""
@@ -189,7 +258,7 @@ class Identifier(Token):
 class Number(Token):
     """Class to represent SQL numbers"""
 
-    def __init__(self, value, validate=True):
+    def __init__(self, value, validate=True, grammar=None, counters=None):
         """Initialize the class.
 
         Parameters
@@ -198,9 +267,13 @@ class Number(Token):
             The value of token
         validate: bool
             Whether to validate the value against token types
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate the value
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
         """
         super().__init__(value, validate, {
-            'number': __TOKEN_TYPES__['number']})
+            'number': _get_token_types(grammar)['number']}, grammar, counters)
 
     def __str__(self):
         """Return the string representation of the token"""
@@ -210,7 +283,7 @@ class Number(Token):
 class String(Token):
     """Class to represent SQL strings"""
 
-    def __init__(self, value, validate=True):
+    def __init__(self, value, validate=True, grammar=None, counters=None):
         """Initialize the class.
 
         Parameters
@@ -219,9 +292,13 @@ class String(Token):
             The value of token
         validate: bool
             Whether to validate the value against token types
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate the value
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
         """
         super().__init__(value, validate, {
-            'string': __TOKEN_TYPES__['string']})
+            'string': _get_token_types(grammar)['string']}, grammar, counters)
 
     def __str__(self):
         """Return the string representation of the token"""
@@ -231,7 +308,7 @@ class String(Token):
 class Whitespace(Token):
     """Class to represent SQL whitespaces"""
 
-    def __init__(self, value, validate=True):
+    def __init__(self, value, validate=True, grammar=None, counters=None):
         """Initialize the class.
 
         Parameters
@@ -240,9 +317,13 @@ class Whitespace(Token):
             The value of token
         validate: bool
             Whether to validate the value against token types
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate the value
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
         """
         super().__init__(value, validate, {
-            'whitespace': __TOKEN_TYPES__['whitespace']})
+            'whitespace': _get_token_types(grammar)['whitespace']}, grammar, counters)
 
     def __str__(self):
         """Return the string representation of the token"""
@@ -252,7 +333,7 @@ class Whitespace(Token):
 class Aggregate(Token):
     """Class to represent SQL aggregates"""
 
-    def __init__(self, value, validate=True):
+    def __init__(self, value, validate=True, grammar=None, counters=None):
         """Initialize the class.
 
         Parameters
@@ -261,10 +342,97 @@ class Aggregate(Token):
             The value of token
         validate: bool
             Whether to validate the value against token types
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar used to validate the value
+        counters: :class: `counters.ParseCounters`
+            Counters of the regex evaluations, counting is disabled if None.
         """
         super().__init__(value, validate, {
-            'aggregate': __TOKEN_TYPES__['aggregate']})
+            'aggregate': _get_token_types(grammar)['aggregate']}, grammar, counters)
 
     def __str__(self):
         """Return the string representation of the token"""
         return f"""Aggregate({self.value})"""
+
+
+class LiteralList(Token):
+    """Class to represent a homogeneous list of SQL literals, `( 1 , 2 , 3 )`.
+
+    The elements are not stored as token objects. Integers are packed into an
+    `array`, other literals are stored as one string with an `array` of end
+    offsets, so the list costs a few bytes per element.
+    """
+
+    def __init__(self, values, literal_class, grammar=None):
+        """Initialize the class.
+
+        Parameters
+        ----------
+        values: list
+            Values of the literals, e.g. `['1', '2', '3']`
+        literal_class: :class: `Number` or :class: `String`
+            Token class of the literals
+        grammar: :class: `grammar.Grammar`
+            Compiled grammar of the query
+        """
+        # The value is derived from the elements, so `Token.__init__` that
+        # sets and validates a value is not used.
+        self._value = None
+        self._properties = {'number': literal_class is Number,
+                            'string': literal_class is String}
+        self.validate = False
+        self.grammar = grammar
+        self.token_dict = {}
+        self.literal_class = literal_class
+
+        self._numbers = None
+        self._text = None
+        self._offsets = None
+
+        if literal_class is Number and all(str(int(value)) == value for value in values):
+            try:
+                self._numbers = array('q', [int(value) for value in values])
+            except OverflowError:
+                self._numbers = None
+
+        if self._numbers is None:
+            self._text = "".join(values)
+            self._offsets = array('L', accumulate(len(value) for value in values))
+
+    def __len__(self):
+        """Return the number of literals in the list."""
+        if self._numbers is not None:
+            return len(self._numbers)
+
+        return len(self._offsets)
+
+    def __iter__(self):
+        """Lazily iterate over the values of the literals."""
+        if self._numbers is not None:
+            return map(str, self._numbers)
+
+        return (self._text[start:end] for start, end in
+                zip(chain((0,), self._offsets), self._offsets))
+
+    def __getitem__(self, index):
+        """Return the value of the literal at the given index."""
+        if self._numbers is not None:
+            return str(self._numbers[index])
+
+        end = self._offsets[index]
+        start = self._offsets[index - 1] if index % len(self._offsets) else 0
+        return self._text[start:end]
+
+    def __str__(self):
+        """Return the string representation of the token"""
+        return f"""LiteralList({self.literal_class.__name__}, {len(self)})"""
+
+    @property
+    def value(self):
+        """Return the SQL text of the list"""
+        return "( " + " , ".join(self) + " )"
+
+    @value.setter
+    def value(self, value):
+        """Literal lists are immutable"""
+        raise AttributeError("Value of a LiteralList cannot be set")
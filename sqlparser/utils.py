@@ -133,31 +133,61 @@ def token_name2type_dict():
     return token_name2type
 
 
-def merge_consequtive_keywords(query):
-    """Merge consequtive keywords that when merged form a valid keyword.
+def build_keyword_trie(keywords):
+    """Build a word level trie from a list of (multi-word) keywords.
 
     Parameters
     ----------
-    query: :class: `Query`
-        Query that is to be processed
+    keywords: list
+        List of keywords, GROUP BY, LEFT OUTER JOIN, etc.
+
+    Returns
+    -------
+    keyword_trie: dict
+        Nested dict where each level is keyed by a single word. A node that
+        completes a keyword holds the keyword under the `None` key.
     """
+    keyword_trie = {}
+
+    for keyword in keywords:
+        node = keyword_trie
+        for word in keyword.split(" "):
+            node = node.setdefault(word, {})
+        node[None] = keyword
+
+    return keyword_trie
+
+
+def match_keyword(keyword_trie, words, start_idx):
+    """Match the longest keyword in `words` starting at `start_idx`.
 
-    for idx, token in enumerate(query.tokens):
-        current_token = token
-        next_token = query.tokens[idx +
-                                  1] if idx < len(query.tokens) - 1 else None
+    Parameters
+    ----------
+    keyword_trie: dict
+        Trie built using `build_keyword_trie`.
+    words: list
+        List of space separated words of a query.
+    start_idx: int
+        Index of the word to start matching from.
+
+    Returns
+    -------
+    tuple
+        Tuple containing the matched keyword (or None) and the index of the
+        first word after the match.
+    """
+    node = keyword_trie
+    keyword, end_idx = None, start_idx
 
-        try:
-            merged_value = current_token.value + " " + \
-                next_token.value if next_token else ""
-        except AttributeError:
-            continue
+    for idx in range(start_idx, len(words)):
+        node = node.get(words[idx])
+        if node is None:
+            break
 
-        if merged_value in token_type_dict['keyword']:
-            query.tokens[idx] = Keyword(merged_value, validate=False)
-            query.tokens.remove(next_token)
+        if None in node:
+            keyword, end_idx = node[None], idx + 1
 
-    return query
+    return keyword, end_idx
 
 
 def print_query_dict(query_dict):
@@ -2,7 +2,6 @@
 import inspect
 import sys
 
-from sqlparser.constants import __TOKEN_PRECEDENCE__ as token_precedence_dict
 from sqlparser.exceptions import InvalidQueryError
 from sqlparser.utils import (get_error_dict, get_flat_query,
                              raise_error_from_dict)
@@ -23,7 +22,7 @@ def base_query_validation(query):
     """
     is_valid = True
     keywords = ['SELECT', 'DELETE', 'UPDATE', 'ALTER', 'CREATE',
-                'DROP', 'INSERT', 'GRANT', 'REVOKE', 'TRUNCATE', 'ROLLBACK']
+                'DROP', 'INSERT', 'INSERT INTO', 'GRANT', 'REVOKE', 'TRUNCATE', 'ROLLBACK']
 
     if query.tokens[0].value not in keywords:
         is_valid = False
@@ -50,6 +49,7 @@ def validate_token_order(query):
     """
     is_valid = True
     tokens = get_flat_query(query)
+    token_precedence_dict = query.grammar.precedence
 
     for token_idx, token in enumerate(tokens):
         current_token_class = token.__class__